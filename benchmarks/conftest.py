@@ -0,0 +1,80 @@
+"""Workloads and helpers shared by the benchmarks."""
+
+from __future__ import annotations
+
+import sys
+import tracemalloc
+from functools import reduce
+from typing import Any, Callable, Text
+
+import pytest
+
+from cusser._misc import _SUPPORTED_ATTRIBUTE_TAGS, _SUPPORTED_COLOR_TAGS, _move, _step
+
+MESSAGE = "The quick brown fox jumps over the lazy dog"
+
+
+@pytest.fixture
+def attribute_text() -> Text:
+    """Return a screenful of text that changes attributes and colors a lot."""
+    # Each line fills a bit more than one and a half rows.
+    line = reduce(
+        lambda acc, tag: acc + tag(MESSAGE[:8]),
+        _SUPPORTED_ATTRIBUTE_TAGS + _SUPPORTED_COLOR_TAGS,
+        "",
+    )
+    return "\033[2J" + "\n".join([line] * 10)
+
+
+@pytest.fixture
+def prose_text() -> Text:
+    """Return a screenful of plain text, with a few bold words."""
+    line = f"{MESSAGE} \033[1magain\033[22m, and {MESSAGE.lower()}."
+    return "\n".join([line] * 20)
+
+
+@pytest.fixture
+def gradient_text() -> Text:
+    """Return a screenful of 24-bit color gradients, one color per cell."""
+    lines = []
+    for y in range(20):
+        cells = (
+            f"\033[38;2;{x * 3};{y * 12};{255 - x * 3}m\033[48;2;0;{x};{y}m#"
+            for x in range(80)
+        )
+        lines.append("".join(cells))
+    return "\033[2J" + "".join(lines) + "\033[m"
+
+
+@pytest.fixture
+def cursor_text() -> Text:
+    """Return a layout drawn with lots of cursor movements."""
+    parts = ["\033[2J"]
+    for y in range(20):
+        for x in range(0, 80, 10):
+            parts.append(f"{_move(x + 1, y + 1)}{y:02}:{x:02}{_step(0, 2)}|")
+    return "".join(parts)
+
+
+@pytest.fixture
+def measure(benchmark: Any) -> Callable[..., Any]:
+    """Benchmark a function, also recording the memory it allocates per call."""
+
+    def run(function: Callable[..., Any], *args: Any) -> Any:
+        function(*args)  # Warm up caches before measuring.
+
+        blocks = sys.getallocatedblocks()
+        tracemalloc.start()
+        try:
+            function(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_bytes_per_call"] = peak
+        benchmark.extra_info["retained_blocks_per_call"] = (
+            sys.getallocatedblocks() - blocks
+        )
+
+        return benchmark(function, *args)
+
+    return run
@@ -0,0 +1,31 @@
+"""Benchmarks for color management."""
+
+from typing import Any, Callable
+
+import ochre
+import pytest
+
+from cusser.color_manager import ColorManager
+
+pytest.importorskip("pytest_benchmark")
+
+
+def test_same_pair(measure: Callable[..., Any]):
+    """Look up the same color pair over and over."""
+    color_manager = ColorManager()
+    color_manager.add(ochre.ColorPair(), allow_zero=True)
+    foreground, background = ochre.Ansi256(1), ochre.Ansi256(4)
+    measure(color_manager.pair_index, foreground, background)
+
+
+def test_churn(measure: Callable[..., Any]):
+    """Cycle through more 24-bit colors than the terminal can hold."""
+    color_manager = ColorManager(max_colors=256, max_pairs=256)
+    color_manager.add(ochre.ColorPair(), allow_zero=True)
+    colors = [ochre.Hex(value * 4099) for value in range(1024)]
+
+    def churn() -> None:
+        for color in colors:
+            color_manager.pair_index(color, None)
+
+    measure(churn)
@@ -0,0 +1,49 @@
+"""Benchmarks for the event loop."""
+
+import os
+from typing import Any, Callable
+
+import pytest
+
+from cusser import Cusser
+from cusser.loop import EventLoop
+
+pytest.importorskip("pytest_benchmark")
+
+KEYS = 100
+
+
+def test_key_to_paint(measure: Callable[..., Any]):
+    """Type keys one at a time, each as soon as the previous one is drawn."""
+    read, write = os.pipe()
+    os.set_blocking(read, False)
+    stdscr = Cusser.headless()
+
+    def getch() -> int:
+        try:
+            return os.read(read, 1)[0]
+        except (BlockingIOError, IndexError):
+            return -1
+
+    stdscr.window.getch = getch
+
+    def session() -> None:
+        loop = EventLoop(stdscr, doupdate=lambda: None, input=read)
+
+        def draw() -> None:
+            stdscr.move(0, 0)
+            stdscr.addstr(f"{loop.frames:03}")
+            if loop.frames < KEYS:
+                os.write(write, b"x")
+            else:
+                loop.stop()
+
+        loop.draw = draw
+        loop.on_key = lambda key: loop.invalidate()
+        loop.run()
+
+    try:
+        measure(session)
+    finally:
+        os.close(read)
+        os.close(write)
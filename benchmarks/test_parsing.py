@@ -0,0 +1,48 @@
+"""Benchmarks for turning ANSI text into instructions."""
+
+from typing import Any, Callable, Text
+
+import pytest
+from stransi import Ansi
+
+from cusser import Cusser
+from cusser.document import parse_document
+from cusser.tokenizer import tokenize
+
+pytest.importorskip("pytest_benchmark")
+
+
+def test_stransi(measure: Callable[..., Any], attribute_text: Text):
+    """Parse attribute-heavy text with stransi alone."""
+    measure(lambda: list(Ansi(attribute_text).instructions()))
+
+
+def test_cached_instructions(measure: Callable[..., Any], attribute_text: Text):
+    """Parse attribute-heavy text that was seen before."""
+    stdscr = Cusser.headless()
+    measure(stdscr._instructions, attribute_text[:4096])
+
+
+PARSERS = {
+    "stransi": lambda text: list(Ansi(text).instructions()),
+    "tokenizer": tokenize,
+}
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+@pytest.mark.parametrize("workload", ["prose_text", "gradient_text"])
+def test_tokenize(
+    measure: Callable[..., Any], request: Any, parser: Text, workload: Text
+):
+    """Parse text-heavy and escape-heavy input, with stransi and the tokenizer."""
+    measure(PARSERS[parser], request.getfixturevalue(workload))
+
+
+@pytest.mark.parametrize("workers", [1, 2, 4])
+def test_parse_document(measure: Callable[..., Any], workers: int):
+    """Parse a document of a few megabytes in a pool of processes."""
+    document = "\n".join(
+        f"\033[2m{i:06}\033[22m \033[3{i % 8}m{'lorem ipsum ' * 8}\033[m"
+        for i in range(50000)
+    )
+    measure(parse_document, document, workers, 1 << 18)
@@ -0,0 +1,92 @@
+"""Benchmarks for rendering ANSI text on a headless window."""
+
+from typing import Any, Callable, Text
+
+import pytest
+
+from cusser import Cusser, HeadlessWindow
+from cusser.screen import VirtualScreen
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture
+def stdscr() -> Cusser:
+    """Return a headless Cusser."""
+    return Cusser.headless(24, 80)
+
+
+def test_attributes(measure: Callable[..., Any], stdscr: Cusser, attribute_text: Text):
+    """Render text full of attribute and color changes."""
+    measure(stdscr.addstr, attribute_text)
+
+
+class NullWindow:
+    """A window that draws nothing, so that only the cost of `Cusser` is left."""
+
+    def addstr(self, *args: Any) -> None:
+        """Draw nothing."""
+
+    def attrset(self, attr: int) -> None:
+        """Set nothing."""
+
+
+def test_short_string(measure: Callable[..., Any]):
+    """Render a short, cached string, which mostly costs the overhead of a call."""
+    stdscr = Cusser(
+        NullWindow(),  # type: ignore[arg-type]
+        color_manager=HeadlessWindow(24, 80).color_manager(),
+        init_colors=False,
+    )
+    measure(stdscr.addstr, "\033[1mCPU\033[m: 42%")
+
+
+def test_uncached_attributes(measure: Callable[..., Any], attribute_text: Text):
+    """Render text full of attribute and color changes, parsing it every time."""
+    stdscr = Cusser.headless(24, 80, cache_size=0)
+    measure(stdscr.addstr, attribute_text)
+
+
+def test_gradient(measure: Callable[..., Any], stdscr: Cusser, gradient_text: Text):
+    """Render a 24-bit color gradient."""
+    measure(stdscr.addstr, gradient_text)
+
+
+def test_cursor(measure: Callable[..., Any], stdscr: Cusser, cursor_text: Text):
+    """Render a layout made of many cursor movements."""
+    measure(stdscr.addstr, cursor_text)
+
+
+def test_program(measure: Callable[..., Any], stdscr: Cusser, attribute_text: Text):
+    """Replay text full of attribute and color changes compiled as a program."""
+    program = stdscr.compile(attribute_text.replace("{", "{{").replace("}", "}}"))
+    measure(stdscr.run, program)
+
+
+def test_virtual_screen(measure: Callable[..., Any], cursor_text: Text):
+    """Render a layout on a virtual screen and commit it."""
+    window = HeadlessWindow(24, 80)
+    screen = Cusser(
+        VirtualScreen(window), color_manager=window.color_manager(), init_colors=False
+    )
+
+    def render() -> None:
+        screen.addstr(cursor_text)
+        screen.refresh()
+
+    measure(render)
+
+
+@pytest.mark.parametrize("lines", [100, 100000])
+def test_document(measure: Callable[..., Any], stdscr: Cusser, lines: int):
+    """Render the start of a document of a few lines or a few megabytes."""
+    document = "\n".join(
+        f"\033[2m{i:06}\033[22m \033[3{i % 8}m{'lorem ipsum ' * 8}\033[m"
+        for i in range(lines)
+    )
+
+    def render() -> None:
+        stdscr.move(0, 0)
+        stdscr.adddocument(document)
+
+    measure(render)
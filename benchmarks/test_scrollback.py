@@ -0,0 +1,29 @@
+"""Benchmarks for scrolling through a long history."""
+
+from typing import Any, Callable
+
+import pytest
+
+from cusser import Cusser
+from cusser.scrollback import Scrollback
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.parametrize("size", [1000, 100000])
+def test_scroll(measure: Callable[..., Any], size: int):
+    """Scroll through the middle of a history, rendering every step."""
+    scrollback = Scrollback(Cusser.headless(24, 80), capacity=size)
+    scrollback.append(
+        "\n".join(
+            f"\033[2m{i:06}\033[22m \033[3{i % 8}mlog line {i}" for i in range(size)
+        )
+    )
+
+    def scroll() -> None:
+        scrollback.scroll_to(size // 2)
+        for _ in range(24):
+            scrollback.scroll(1)
+            scrollback.render()
+
+    measure(scroll)
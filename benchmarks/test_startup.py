@@ -0,0 +1,34 @@
+"""Benchmarks for how long it takes to start drawing."""
+
+import subprocess
+import sys
+from typing import Any, Text
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+FIRST_FRAME = (
+    "from cusser import Cusser;"
+    "stdscr = Cusser.headless();"
+    "stdscr.addstr('\\033[2J\\033[1;31mhello\\033[m');"
+    "stdscr.refresh()"
+)
+
+
+def python(code: Text) -> None:
+    """Run Python code in a fresh interpreter."""
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        pytest.param("pass", id="interpreter"),
+        pytest.param("import cusser", id="import"),
+        pytest.param(FIRST_FRAME, id="first_frame"),
+    ],
+)
+def test_startup(benchmark: Any, code: Text):
+    """Start an interpreter and run code (the interpreter alone is a reference)."""
+    benchmark.pedantic(python, args=(code,), rounds=20, warmup_rounds=2)
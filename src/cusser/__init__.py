@@ -4,33 +4,81 @@
 from __future__ import annotations
 
 import curses
-from dataclasses import dataclass
-from typing import Text
-
-import ochre
-from stransi import Ansi, SetAttribute, SetClear, SetColor, SetCursor
-from stransi.attribute import Attribute
-from stransi.clear import Clear
-from stransi.color import ColorRole
-from stransi.cursor import CursorMove
-
-from .color_manager import ColorManager
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from importlib import import_module
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Iterable, Mapping, Optional, Text
+
+# The parsing and color dependencies take a while to import, so they are only
+# imported when they are needed (see `_rendering`).
+if TYPE_CHECKING:
+    import ochre
+    from stransi.clear import Clear
+    from stransi.cursor import CursorMove
+    from stransi.instruction import Instruction
+
+    from . import _rendering
+    from .color_manager import ColorManager
+    from .compositor import Compositor
+    from .document import Document, Line, Style
+    from .headless import HeadlessWindow
+    from .palette import Palette
+    from .pen import Pen
+    from .program import Program
+    from .stats import RenderStats
+    from .stream import StreamWriter
 
 __version__ = "0.2.0"
 
+# Escape codes that select graphic renditions (attributes and colors).
+_SGR = re.compile(r"\N{ESC}\[[\d;]*m")
+
+
+__all__ = [
+    "Compositor",
+    "Cusser",
+    "HeadlessWindow",
+    "Palette",
+    "Pen",
+    "Program",
+    "RenderStats",
+    "StreamWriter",
+]
+
+# Exported names that are imported from their modules on first access.
+_LAZY_EXPORTS = {
+    "Compositor": ".compositor",
+    "HeadlessWindow": ".headless",
+    "Palette": ".palette",
+    "Pen": ".pen",
+    "Program": ".program",
+    "RenderStats": ".stats",
+    "StreamWriter": ".stream",
+}
+
+
+def __getattr__(name: Text) -> Any:
+    """Import lazily exported names."""
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = getattr(
+        import_module(_LAZY_EXPORTS[name], __name__), name
+    )
+    return value
 
-__all__ = ["Cusser"]
+
+def __dir__() -> list[Text]:
+    """List the module attributes, including lazily exported names."""
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
 
 
 def on_add_color(color: ochre.Color, manager: ColorManager) -> None:
     """Initialize a color when it is added to the color manager."""
-    color = color.rgb
-    return curses.init_color(
-        manager[color],
-        int(1000 * color.red),
-        int(1000 * color.green),
-        int(1000 * color.blue),
-    )
+    from .color_manager import curses_rgb
+
+    return curses.init_color(manager[color], *curses_rgb(color))
 
 
 def on_add_pair(pair: ochre.ColorPair, manager: ColorManager) -> None:
@@ -38,97 +86,410 @@ def on_add_pair(pair: ochre.ColorPair, manager: ColorManager) -> None:
     curses.init_pair(manager[pair], manager[pair.foreground], manager[pair.background])
 
 
+def _addstr(window: Any, y: int, x: int, text: Text, attr: int) -> None:
+    """Add text at a position, even if it ends in the bottom right cell."""
+    try:
+        window.addstr(y, x, text, attr)
+    except curses.error:
+        # Writing the bottom right cell succeeds but reports an error.
+        height, width = window.getmaxyx()
+        if (y, x + len(text)) != (height - 1, width):
+            raise
+
+
+_color_manager: Optional[ColorManager] = None
+
+
+def default_color_manager() -> ColorManager:
+    """Return the color manager shared by all windows of the terminal."""
+    global _color_manager
+
+    if _color_manager is None:
+        from .color_manager import ColorManager
+
+        _color_manager = ColorManager(
+            on_add_color=on_add_color, on_add_pair=on_add_pair
+        )
+    return _color_manager
+
+
 @dataclass
 class Cusser:
-    """A curses wrapper that understands ANSI escape code sequences."""
+    """
+    A curses wrapper that understands ANSI escape code sequences.
+
+    Colors are global to the terminal, so all instances share one color manager
+    unless given their own. Attributes and colors set by escape codes are kept in
+    a pen per instance instead, so windows don't affect each other.
+    """
 
     window: curses._CursesWindow
-    color_manager: ColorManager = ColorManager(
-        on_add_color=on_add_color, on_add_pair=on_add_pair
+    color_manager: ColorManager = field(default_factory=default_color_manager)
+
+    # Set curses colors up. Windows that don't live on a terminal don't need it.
+    init_colors: bool = True
+
+    cache_size: int = 256
+    cache_hits: int = field(default=0, init=False, compare=False)
+    cache_misses: int = field(default=0, init=False, compare=False)
+    _cache: OrderedDict[Text, list[Instruction | Text]] = field(
+        default_factory=OrderedDict, init=False, repr=False, compare=False
     )
 
-    _ON_ATTR_MAP = {
-        Attribute.BOLD: curses.A_BOLD,
-        Attribute.DIM: curses.A_DIM,
-        Attribute.ITALIC: curses.A_ITALIC,
-        Attribute.UNDERLINE: curses.A_UNDERLINE,
-        Attribute.BLINK: curses.A_BLINK,
-        Attribute.REVERSE: curses.A_REVERSE,
-        Attribute.HIDDEN: curses.A_INVIS,
-    }
-
-    _OFF_ATTR_MAP = {
-        Attribute.NEITHER_BOLD_NOR_DIM: curses.A_BOLD | curses.A_DIM,
-        Attribute.NOT_ITALIC: curses.A_ITALIC,
-        Attribute.NOT_UNDERLINE: curses.A_UNDERLINE,
-        Attribute.NOT_BLINK: curses.A_BLINK,
-        Attribute.NOT_REVERSE: curses.A_REVERSE,
-        Attribute.NOT_HIDDEN: curses.A_INVIS,
-    }
-
-    def __post_init__(self):
+    # Render statistics, only collected when set.
+    stats: Optional[RenderStats] = field(default=None, compare=False)
+
+    pen: Pen = field(init=False, compare=False)
+    # The attribute word last set on the window, if known.
+    _word: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    # While rendering, the cursor position of the window (if known) and where the
+    # cursor should go before the next write (if anywhere).
+    _position: Optional[tuple[int, int]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _target: Optional[tuple[int, int]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Whether colors were set up, which is only done before the first write.
+    _colors_ready: bool = field(default=False, init=False, repr=False, compare=False)
+
+    # Longer strings (whole documents, say) are parsed but never cached.
+    _CACHEABLE_LENGTH = 4096
+
+    def __post_init__(self) -> None:
+        """Import what rendering needs, leaving color setup for later."""
+        # Importing the submodule also binds it in this module, for the methods.
+        import_module("._rendering", __name__)
+        self.pen = _rendering.Pen()
+
+    @classmethod
+    def headless(cls, lines: int = 24, cols: int = 80, **kwargs: Any) -> Cusser:
+        """Return a Cusser drawing on an in-memory window, with its own colors."""
+        from .headless import HeadlessWindow
+
+        window = HeadlessWindow(lines, cols)
+        kwargs.setdefault("color_manager", window.color_manager())
+        return cls(window, init_colors=False, **kwargs)
+
+    def addstr(self, text: Text) -> None:
         """
-        Initialize the color manager.
+        Add a string to the window, interpreting ANSI escape codes.
 
-        We assume the terminal actually supports colors.
+        Attribute and color changes only update the pen. They are applied with a
+        single `attrset` right before the next piece of text (or at the end of the
+        string), and only if the resulting attribute word actually changed.
         """
-        curses.start_color()
-        curses.use_default_colors()
+        self._render(self._instructions(text))
 
-        # We have to define the zero color pair here, otherwise we'll get a nasty
-        # error later.
-        self.color_manager.add_pair(
-            ochre.ColorPair(ochre.WebColor("white"), ochre.WebColor("black")),
-            allow_zero=True,
-        )
+    def adddocument(self, text: Text | Document, skip: int = 0) -> int:
+        """
+        Add a whole document, one line per row, starting at the cursor row.
 
-    def addstr(self, text: Text) -> None:
-        """Add a string to the window, interpreting ANSI escape codes."""
-        for instruction in Ansi(text).instructions():
+        Unlike `addstr`, lines are clipped to the window width instead of wrapped,
+        and only the lines that fit are parsed: the rest of the document is never
+        looked at. The first `skip` lines are left out, but their attributes and
+        colors still apply. Cursor movements and clears are ignored.
+
+        The document may also have been parsed with `document.parse_document`, in
+        which case it is drawn as is and the pen is left unchanged.
+
+        Return the number of lines added.
+        """
+        if not self._colors_ready:
+            self._setup_colors()
+
+        height = self.window.getmaxyx()[0]
+        y = self.window.getyx()[0]
+        if isinstance(text, Text):
+            count = self._add_text_lines(y, text, skip)
+        else:
+            lines = text.lines[skip : skip + height - y]  # noqa: E203
+            count = self._add_parsed_lines(y, lines)
+        if y + count < height:
+            self.window.move(y + count, 0)
+        return count
+
+    def _add_text_lines(self, y: int, text: Text, skip: int) -> int:
+        """Add the lines of a document that fit, from a row, after skipping some."""
+        start = 0
+        for _ in range(skip):
+            if (start := text.find("\n", start) + 1) == 0:
+                start = len(text)
+                break
+        self._apply_styles("".join(_SGR.findall(text, 0, start)))
+
+        height, count = self.window.getmaxyx()[0], 0
+        while y + count < height and start < len(text):
+            if (end := text.find("\n", start)) < 0:
+                end = len(text)
+            self._add_line(y + count, text[start:end].rstrip("\r"))
+            start, count = end + 1, count + 1
+        return count
+
+    def _add_parsed_lines(self, y: int, lines: list[Line]) -> int:
+        """Add parsed lines from a row."""
+        key_color, color_pair = _rendering.key_color, _rendering.color_pair
+        # Attribute words by style, computed once per call.
+        words: dict[Style, int] = {}
+        for row, line in enumerate(lines, y):
+            x = 0
+            for attrs, foreground, background, text in line:
+                key: Style = (attrs, foreground, background)
+                if (word := words.get(key)) is None:
+                    index = self.color_manager.pair_index(
+                        key_color(foreground), key_color(background)
+                    )
+                    word = words[key] = attrs | color_pair(index)
+                x = self._add_run(row, x, text, word)
+        return len(lines)
+
+    def preload(
+        self,
+        colors: Iterable[Optional[ochre.Color]],
+        pairs: Optional[Iterable[ochre.ColorPair]] = None,
+        pin: bool = False,
+        indices: Optional[Mapping[Text, list[list[int]]]] = None,
+    ) -> None:
+        """
+        Register a theme before the first write, so that it doesn't slow it down.
+
+        `indices` saved from `ColorManager.export_indices` are restored first. See
+        `ColorManager.preload` for the other arguments.
+        """
+        if not self._colors_ready:
+            self._setup_colors()
+        if indices is not None:
+            self.color_manager.import_indices(indices)
+        self.color_manager.preload(colors, pairs, pin)
+
+    def writer(self, encoding: Text = "utf-8") -> StreamWriter:
+        """Return a writer that accepts text (or bytes) in arbitrary chunks."""
+        from .stream import StreamWriter
+
+        return StreamWriter(self, encoding=encoding)
+
+    def _render(self, instructions: Iterable[Instruction | Text]) -> None:
+        """Apply instructions to the window, collecting statistics if enabled."""
+        if not self._colors_ready:
+            self._setup_colors()
+        # The cursor is only tracked while rendering, as the window may be used
+        # directly in between.
+        self._position = self._target = None
+        if self.stats is None:
+            self._apply(instructions)
+            return self._finish()
+
+        stats = self.stats
+        color_manager = self.color_manager
+        colors, pairs = color_manager.added_colors, color_manager.added_pairs
+        window, self.window = self.window, _rendering.CountingWindow(self.window, stats)
+        try:
+            for instruction in instructions:
+                start = perf_counter()
+                self._apply((instruction,))
+                elapsed = perf_counter() - start
+                if isinstance(instruction, Text):
+                    stats.record("text", elapsed)
+                    stats.bytes_written += len(instruction.encode())
+                else:
+                    stats.record(_rendering.KINDS[type(instruction)], elapsed)
+            self._finish()
+        finally:
+            self.window = window
+            stats.colors_added += color_manager.added_colors - colors
+            stats.pairs_added += color_manager.added_pairs - pairs
+            stats.renders += 1
+        if stats.on_render is not None:
+            stats.on_render(stats)
+
+    def _apply(self, instructions: Iterable[Instruction | Text]) -> None:  # noqa: C901
+        """Apply instructions to the window."""
+        window = self.window
+        pen = self.pen
+        for instruction in instructions:
             if isinstance(instruction, Text):
-                self.window.addstr(instruction)
-            elif isinstance(instruction, SetAttribute):
-                self._set_attribute(instruction.attribute)
-            elif isinstance(instruction, SetColor):
-                self._set_color(instruction.role, instruction.color)
-            elif isinstance(instruction, SetClear):
+                if self._target is not None:
+                    self._move_cursor()
+                if (word := pen.word(self.color_manager)) != self._word:
+                    window.attrset(word)
+                    self._word = word
+                window.addstr(instruction)
+                self._position = None
+            elif isinstance(instruction, _rendering.SetAttribute):
+                pen.set_attribute(instruction.attribute)
+            elif isinstance(instruction, _rendering.SetColor):
+                pen.set_color(instruction.role, instruction.color)
+            elif isinstance(instruction, _rendering.SetClear):
                 self._set_clear(instruction.region)
-            elif isinstance(instruction, SetCursor):
+            elif isinstance(instruction, _rendering.SetCursor):
                 self._set_cursor(instruction.move)
             else:
                 raise NotImplementedError(instruction)
 
-    def _set_attribute(self, attribute: Attribute) -> None:
-        """Set the current attribute."""
-        if attribute == Attribute.NORMAL:
-            self._set_color(ColorRole.FOREGROUND, None)
-            self._set_color(ColorRole.BACKGROUND, None)
-            return self.window.attrset(curses.A_NORMAL)
+    def _finish(self) -> None:
+        """Leave the window with the final cursor position and attributes."""
+        self._move_cursor()
+        if (word := self.pen.word(self.color_manager)) != self._word:
+            self.window.attrset(word)
+            self._word = word
+
+    def _apply_styles(self, text: Text) -> None:
+        """Update the pen with the attributes and colors of a string."""
+        pen = self.pen
+        for instruction in _rendering.tokenize(text):
+            if isinstance(instruction, _rendering.SetAttribute):
+                pen.set_attribute(instruction.attribute)
+            elif isinstance(instruction, _rendering.SetColor):
+                pen.set_color(instruction.role, instruction.color)
+
+    def _add_line(self, y: int, line: Text) -> None:
+        """Add a line at a row, clipped to the window, in one call per style."""
+        pen = self.pen
+        width = self.window.getmaxyx()[1]
+        x, pending, word = 0, "", None
+        for instruction in _rendering.tokenize(line):
+            if isinstance(instruction, Text):
+                if x + len(pending) >= width:
+                    # Keep going for the styles that apply to the next lines.
+                    continue
+                if (new_word := pen.word(self.color_manager)) != word:
+                    x = self._add_run(y, x, pending, word)
+                    pending, word = "", new_word
+                pending += instruction
+            elif isinstance(instruction, _rendering.SetAttribute):
+                pen.set_attribute(instruction.attribute)
+            elif isinstance(instruction, _rendering.SetColor):
+                pen.set_color(instruction.role, instruction.color)
+        self._add_run(y, x, pending, word)
+
+    def _add_run(self, y: int, x: int, text: Text, word: Optional[int]) -> int:
+        """Add equally styled text at a position, clipped to the window."""
+        width = self.window.getmaxyx()[1]
+        if not (text := text[: width - x]) or word is None:
+            return x
+        _addstr(self.window, y, x, text, word)
+        return x + len(text)
+
+    def compile(self, text: Text) -> Program:
+        """
+        Compile a string into a program that can be replayed with `run`.
 
-        if attribute in self._ON_ATTR_MAP:
-            return self.window.attron(self._ON_ATTR_MAP[attribute])
+        Color pairs used by the string are registered right away.
+        """
+        if not self._colors_ready:
+            self._setup_colors()
+        return _rendering.Program.compile(_rendering.tokenize(text), self.color_manager)
+
+    def run(self, program: Program, **values: object) -> None:  # noqa: C901
+        """Replay a compiled program, filling its replacement fields with values."""
+        TEXT, ATTRSET, FORMAT = _rendering.TEXT, _rendering.ATTRSET, _rendering.FORMAT
+        CLEAR, MOVE = _rendering.CLEAR, _rendering.MOVE
+        if not self._colors_ready:
+            self._setup_colors()
+        if program.generation != self.color_manager.generation:
+            program.relink(self.color_manager)
+
+        window = self.window
+        self._position = self._target = None
+        for op, arg in program.ops:
+            if op == TEXT:
+                window.addstr(arg)
+                self._position = None
+            elif op == ATTRSET:
+                window.attrset(arg)
+            elif op == FORMAT:
+                window.addstr(arg.format_map(values))
+                self._position = None
+            elif op == CLEAR:
+                self._set_clear(arg)
+            elif op == MOVE:
+                # Consecutive movements were merged when compiling.
+                self._set_cursor(arg)
+                self._move_cursor()
+            else:
+                raise ValueError(f"Unknown operation {op}")
+        self.pen = replace(program.pen)
+        self._word = program.word
 
-        if attribute in self._OFF_ATTR_MAP:
-            return self.window.attroff(self._OFF_ATTR_MAP[attribute])
+    def clear_cache(self) -> None:
+        """Forget all parsed strings and reset the cache counters."""
+        self._cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
 
-        raise ValueError(f"Unsupported attribute: {attribute}")
+    def _setup_colors(self) -> None:
+        """
+        Set colors up, right before the first write.
 
-    def _set_color(self, role: ColorRole, color: ochre.Color) -> None:
-        """Set the current color."""
-        if role == ColorRole.FOREGROUND:
-            self.color_manager.foreground = color
-        elif role == ColorRole.BACKGROUND:
-            self.color_manager.background = color
-        else:
-            raise ValueError(f"Unknown color role {role}")
+        We assume the terminal actually supports colors.
+        """
+        import ochre
+
+        if self.init_colors:
+            self._init_curses_colors()
 
-        self.window.attron(
-            curses.color_pair(self.color_manager[self.color_manager.current_pair])
+        # We have to define the zero color pair here, otherwise we'll get a nasty
+        # error later.
+        self.color_manager.add_pair(
+            ochre.ColorPair(ochre.WebColor("white"), ochre.WebColor("black")),
+            allow_zero=True,
         )
+        self._colors_ready = True
+
+    def _init_curses_colors(self) -> None:
+        """Start curses colors and fit the color manager to the terminal."""
+        from .palette import Palette
+
+        curses.start_color()
+        curses.use_default_colors()
+
+        # Color pairs are encoded in the (8 bits wide) color field of attribute
+        # words, so we can't use more than 256 of them.
+        if self.color_manager.max_colors is None:
+            self.color_manager.max_colors = curses.COLORS
+        if self.color_manager.max_pairs is None:
+            self.color_manager.max_pairs = min(curses.COLOR_PAIRS, 256)
+        # Indexed colors use the terminal colors as they are. The first 16 are
+        # usually themed, so we never redefine them, and we leave all 256 alone if
+        # there are more colors to define.
+        if self.color_manager.indexed_colors is None:
+            self.color_manager.indexed_colors = (
+                256 if curses.COLORS > 256 else min(curses.COLORS, 16)
+            )
+        # Terminals that can't redefine colors (or have none to spare beyond the
+        # indexed ones) get the closest palette colors.
+        if self.color_manager.palette is None and (
+            not curses.can_change_color()
+            or curses.COLORS <= self.color_manager.indexed_colors
+        ):
+            self.color_manager.palette = Palette.xterm(min(curses.COLORS, 256))
+
+    def _instructions(self, text: Text) -> list[Instruction | Text]:
+        """Return the instructions of a string, reusing previous parses."""
+        if self.cache_size <= 0 or len(text) > self._CACHEABLE_LENGTH:
+            return _rendering.tokenize(text)
+
+        cache = self._cache
+        try:
+            instructions = cache[text]
+        except KeyError:
+            self.cache_misses += 1
+            instructions = cache[text] = _rendering.tokenize(text)
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+            return instructions
+
+        self.cache_hits += 1
+        cache.move_to_end(text)
+        return instructions
 
     def _set_clear(self, region: Clear) -> None:
         """Set the current clear region."""
+        Clear = _rendering.Clear
+        self._move_cursor()
+
         if region == Clear.SCREEN:
+            self._position = None
             return self.window.erase()
 
         if region == Clear.SCREEN_AFTER:
@@ -136,10 +497,11 @@ class Cusser:
 
         if region == Clear.LINE:
             # https://stackoverflow.com/a/20311594/4039050
-            y, x = self.window.getyx()  # noqa: W0612
-            self.window.move(y, 0)
+            y, x = self._cursor()
+            if x != 0:
+                self.window.move(y, 0)
+                self._position = (y, 0)
             return self.window.clrtoeol()
-            # self.window.move(y, x)
 
         if region == Clear.LINE_AFTER:
             return self.window.clrtoeol()
@@ -147,15 +509,36 @@ class Cusser:
         raise ValueError(f"Unsupported clear region {region}")
 
     def _set_cursor(self, move: CursorMove) -> None:
-        """Set the current cursor position."""
+        """
+        Set the current cursor position.
+
+        The window cursor is only moved before the next write (see `_move_cursor`),
+        so that consecutive movements cost a single `move`.
+        """
         if not move.relative:
-            y, x = move.y, move.x
+            self._target = move.y, move.x
         else:
-            y, x = self.window.getyx()
-            y += move.y
-            x += move.x
-        self.window.move(y, x)
+            y, x = self._target or self._cursor()
+            self._target = y + move.y, x + move.x
+
+    def _cursor(self) -> tuple[int, int]:
+        """Return the cursor position of the window, asking it only if unknown."""
+        if self._position is None:
+            self._position = self.window.getyx()
+        return self._position
+
+    def _move_cursor(self) -> None:
+        """Move the window cursor where it should be, unless it is already there."""
+        if self._target is None:
+            return
+        if self._target != self._position:
+            self.window.move(*self._target)
+            self._position = self._target
+        self._target = None
 
     def __getattr__(self, name):
         """Forward all other calls to the underlying window."""
+        if name.startswith("attr"):
+            # The window attributes are about to be changed behind our back.
+            self._word = None
         return getattr(self.window, name)
@@ -5,6 +5,7 @@ import curses
 import sys
 from functools import reduce
 
+from . import Cusser
 from ._misc import (
     _SUPPORTED_ATTRIBUTE_TAGS,
     _SUPPORTED_COLOR_TAGS,
@@ -14,15 +15,32 @@ from ._misc import (
     _move,
     _step,
 )
+from .recorder import read_header, replay
 
-if __name__ == "__main__":
+if __name__ == "__main__":  # noqa: C901
     if len(sys.argv) < 2:
         print(
             f"usage: {sys.argv[0]} <example>, where <example> is one of: "
-            "'attributes', 'colors', 'clear', 'cursor'"
+            "'attributes', 'colors', 'clear', 'cursor'\n"
+            f"       {sys.argv[0]} replay <file> [--fast] [--headless]"
         )
         sys.exit(1)
 
+    if sys.argv[1] == "replay":
+        # Replay a recording, and report how fast it was drawn.
+        fast, headless = "--fast" in sys.argv[3:], "--headless" in sys.argv[3:]
+        with open(sys.argv[2], "rb") as file:
+            if headless:
+                stdscr = Cusser.headless(*read_header(file))
+                file.seek(0)
+                report = replay(stdscr, file, fast, doupdate=lambda: None)
+            else:
+                report = curses.wrapper(
+                    lambda stdscr: replay(Cusser(stdscr), file, fast)
+                )
+        print(report.summary())
+        sys.exit(0)
+
     MESSAGE = "The quick brown fox jumps over the lazy dog"
 
     if sys.argv[1] == "attributes":
@@ -0,0 +1,36 @@
+"""
+What rendering needs from the parsing and color dependencies.
+
+They take a while to import, so `Cusser` only imports this module when it is
+first instantiated, and looks the names up here afterwards.
+"""
+
+
+from stransi import SetAttribute, SetClear, SetColor, SetCursor
+from stransi.clear import Clear
+
+from .color_manager import key_color
+from .pen import Pen, color_pair
+from .program import ATTRSET, CLEAR, FORMAT, MOVE, TEXT, Program
+from .stats import KINDS, CountingWindow
+from .tokenizer import tokenize
+
+__all__ = [
+    "ATTRSET",
+    "CLEAR",
+    "Clear",
+    "CountingWindow",
+    "FORMAT",
+    "KINDS",
+    "MOVE",
+    "Pen",
+    "Program",
+    "SetAttribute",
+    "SetClear",
+    "SetColor",
+    "SetCursor",
+    "TEXT",
+    "color_pair",
+    "key_color",
+    "tokenize",
+]
@@ -0,0 +1,132 @@
+"""An asyncio front-end that batches writes and limits the refresh rate."""
+
+
+from __future__ import annotations
+
+import asyncio
+import curses
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Optional, Text
+
+if TYPE_CHECKING:
+    from . import Cusser
+    from .compositor import Compositor
+
+
+@dataclass
+class AsyncRenderer:
+    """
+    Collect writes from coroutines and apply them in batches, once per frame.
+
+    Each frame applies every write queued so far, calls `noutrefresh` once per
+    window written to (or refreshes the `compositor`, if there is one) and then
+    `doupdate` once, so bursts of writes cost a single repaint. Frames are at
+    least `1 / max_fps` seconds apart.
+
+    Use it as an asynchronous context manager, or call `start` and `stop`.
+    """
+
+    max_fps: float = 60.0
+    doupdate: Callable[[], None] = curses.doupdate
+    compositor: Optional[Compositor] = None
+
+    frames: int = field(default=0, init=False)
+    writes: int = field(default=0, init=False)
+
+    _queue: Optional[asyncio.Queue[tuple[Cusser, Text]]] = field(
+        default=None, init=False, repr=False
+    )
+    _task: Optional[asyncio.Task[None]] = field(default=None, init=False, repr=False)
+    # Writes taken off the queue for the upcoming frame.
+    _batch: list[tuple[Cusser, Text]] = field(
+        default_factory=list, init=False, repr=False
+    )
+    _error: Optional[Exception] = field(default=None, init=False, repr=False)
+
+    def addstr(self, cusser: Cusser, text: Text) -> None:
+        """Queue a string to be added to a window in the next frame."""
+        if self._queue is None:
+            raise RuntimeError("The renderer is not running")
+        self._queue.put_nowait((cusser, text))
+
+    async def start(self) -> None:
+        """Start rendering frames in the background."""
+        if self._task is not None:
+            raise RuntimeError("The renderer is already running")
+        self._error = None
+        self._queue = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop rendering frames, applying any pending writes right away.
+
+        If rendering failed, the error is raised here (and pending writes are
+        dropped).
+        """
+        if self._task is None:
+            return
+
+        task, self._task = self._task, None
+        try:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            if self._error is None and (batch := self._drain()):
+                self._frame(batch)
+        finally:
+            self._queue = None
+            self._batch = []
+        if (error := self._error) is not None:
+            self._error = None
+            raise error
+
+    async def __aenter__(self) -> AsyncRenderer:
+        """Start the renderer."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Stop the renderer."""
+        await self.stop()
+
+    async def _run(self) -> None:
+        """Render a frame whenever there are writes, but not too often."""
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.max_fps
+        next_frame = loop.time()
+        try:
+            while True:
+                self._batch.append(await self._queue.get())
+                if (delay := next_frame - loop.time()) > 0:
+                    await asyncio.sleep(delay)
+                self._frame(self._drain())
+                next_frame = loop.time() + interval
+        except Exception as error:
+            self._error = error
+
+    def _drain(self) -> list[tuple[Cusser, Text]]:
+        """Return the writes for the upcoming frame, including all queued ones."""
+        assert self._queue is not None
+        batch, self._batch = self._batch, []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    def _frame(self, batch: list[tuple[Cusser, Text]]) -> None:
+        """Apply a batch of writes and update the screen once."""
+        touched: dict[int, Cusser] = {}
+        for cusser, text in batch:
+            cusser.addstr(text)
+            touched[id(cusser)] = cusser
+        if self.compositor is not None:
+            self.compositor.refresh()
+        else:
+            for cusser in touched.values():
+                cusser.noutrefresh()
+            self.doupdate()
+        self.frames += 1
+        self.writes += len(batch)
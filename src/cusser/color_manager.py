@@ -3,18 +3,79 @@
 
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass, field
+from operator import index
 from typing import Callable, Iterable, Iterator, Mapping, MutableSet, Optional, Union
 
 import ochre
 
+from .palette import Palette, pack
+
+# Keys of indexed colors are kept apart from those of 24-bit colors.
+_INDEXED = 1 << 24
+
+
+def color_key(color: Optional[ochre.Color]) -> int:
+    """
+    Return a plain integer identifying a color.
+
+    This is much cheaper to hash than the color itself.
+    """
+    if color is None:
+        return -1
+    if type(color) is ochre.Ansi256:
+        return _INDEXED | color.code
+    return pack(color)
+
+
+def key_color(key: int) -> Optional[ochre.Color]:
+    """Return a color identified by a key from `color_key`."""
+    if key < 0:
+        return None
+    if key & _INDEXED:
+        return ochre.Ansi256(key & 0xFF)
+    return ochre.Hex(key)
+
+
+def curses_rgb(color: ochre.Color) -> tuple[int, int, int]:
+    """Return the red, green and blue components of a color, from 0 to 1000."""
+    value = index(color) if type(color) is ochre.Ansi256 else pack(color)
+    return (
+        (value >> 16) * 1000 // 255,
+        (value >> 8 & 0xFF) * 1000 // 255,
+        (value & 0xFF) * 1000 // 255,
+    )
+
 
 @dataclass
 class ColorManager(
     Mapping[Union[Optional[ochre.Color], ochre.ColorPair], int],
     MutableSet[Union[Optional[ochre.Color], ochre.ColorPair]],
 ):
-    """A class for managing curses colors and color pairs."""
+    """
+    A class for managing curses colors and color pairs.
+
+    If `max_colors` or `max_pairs` are set, indices are kept below them. Freed
+    indices are then recycled and, when everything is taken, the least recently
+    used pairs are evicted (along with colors no pair uses anymore). The
+    `generation` counter changes whenever an index is given up, so that cached
+    indices can be checked for staleness.
+
+    If a `palette` is set, colors are never defined: each one is mapped to the
+    index of the closest palette color instead (and `on_add_color` is not called).
+
+    Indexed colors below `indexed_colors` are mapped to the terminal colors of the
+    same index, which are never defined either. Other colors are given indices
+    from `indexed_colors` up.
+
+    Colors are looked up by their packed integer values (see `color_key`), which
+    is much cheaper than hashing them.
+
+    A theme can be registered up front with `preload`, and pinned so that it is
+    never evicted. The resulting indices can be saved with `export_indices` and
+    restored in a later session with `import_indices`.
+    """
 
     color_indices: dict[ochre.Color, int] = field(default_factory=lambda: {None: -1})
     next_color_index = 0
@@ -27,6 +88,62 @@ class ColorManager(
 
     current_pair: ochre.ColorPair = ochre.ColorPair()
 
+    max_colors: Optional[int] = None
+    max_pairs: Optional[int] = None
+    indexed_colors: Optional[int] = None
+
+    palette: Optional[Palette] = None
+
+    added_colors: int = field(default=0, init=False, compare=False)
+    added_pairs: int = field(default=0, init=False, compare=False)
+    evicted_colors: int = field(default=0, init=False, compare=False)
+    evicted_pairs: int = field(default=0, init=False, compare=False)
+    generation: int = field(default=0, init=False, compare=False)
+
+    # Color indices and the keys of the colors using them.
+    _color_keys: dict[int, int] = field(
+        default_factory=lambda: {-1: -1}, init=False, repr=False, compare=False
+    )
+    _color_index_keys: dict[int, list[int]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    # Interned color pairs and their indices, keyed by the color keys.
+    _pair_table: dict[tuple[int, int], tuple[ochre.ColorPair, int]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _pair_keys: dict[int, list[tuple[int, int]]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    # Bookkeeping for recycling and eviction, all keyed by index. Pairs are kept
+    # in least recently used order, along with the indices of their colors.
+    _free_colors: list[int] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    _free_pairs: list[int] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    _color_objects: dict[int, Optional[ochre.Color]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _color_users: dict[int, int] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _idle_colors: OrderedDict[int, Optional[ochre.Color]] = field(
+        default_factory=OrderedDict, init=False, repr=False, compare=False
+    )
+    _pair_lru: OrderedDict[int, tuple[ochre.ColorPair, int, int]] = field(
+        default_factory=OrderedDict, init=False, repr=False, compare=False
+    )
+    # Pinned pairs (kept out of the LRU order) and colors, keyed by index.
+    _pinned_pairs: dict[int, tuple[ochre.ColorPair, int, int]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _pinned_colors: set[int] = field(
+        default_factory=set, init=False, repr=False, compare=False
+    )
+
     @property
     def foreground(self) -> ochre.Color:
         """Return the current foreground color."""
@@ -35,11 +152,8 @@ class ColorManager(
     @foreground.setter
     def foreground(self, color: ochre.Color) -> None:
         """Set the current foreground color."""
-        self.current_pair = ochre.ColorPair(
-            foreground=color, background=self.background
-        )
-        self.add_color(color)
-        self.add_pair(self.current_pair)
+        if color is not self.foreground:
+            self.current_pair = self._intern_pair(color, self.background)[0]
 
     @property
     def background(self) -> ochre.Color:
@@ -49,11 +163,8 @@ class ColorManager(
     @background.setter
     def background(self, color: ochre.Color) -> None:
         """Set the current background color."""
-        self.current_pair = ochre.ColorPair(
-            foreground=self.foreground, background=color
-        )
-        self.add_color(color)
-        self.add_pair(self.current_pair)
+        if color is not self.background:
+            self.current_pair = self._intern_pair(self.foreground, color)[0]
 
     @property
     def colors(self) -> Iterator[ochre.Color]:
@@ -67,49 +178,368 @@ class ColorManager(
         """Return all color pairs currently registered."""
         return self.pair_indices.keys()
 
+    def pair_index(
+        self, foreground: Optional[ochre.Color], background: Optional[ochre.Color]
+    ) -> int:
+        """Return the index of a color pair, registering it if needed."""
+        return self._intern_pair(foreground, background)[1]
+
+    def _intern_pair(
+        self, foreground: Optional[ochre.Color], background: Optional[ochre.Color]
+    ) -> tuple[ochre.ColorPair, int]:
+        """Return the interned color pair for two colors, along with its index."""
+        key = (color_key(foreground), color_key(background))
+        try:
+            entry = self._pair_table[key]
+        except KeyError:
+            self.add_pair(ochre.ColorPair(foreground, background))
+            return self._pair_table[key]
+
+        if self.max_pairs is not None and entry[1] in self._pair_lru:
+            self._pair_lru.move_to_end(entry[1])
+        return entry
+
     def add_color(self, color: Optional[ochre.Color], callback: bool = True) -> None:
         """Register a color with the color manager."""
-        if color in self.color_indices:
+        key = color_key(color)
+        if key in self._color_keys:
             return
 
-        self.color_indices[color] = self.next_color_index
-        self.next_color_index += 1
-        if callback and self.on_add_color:
+        if color in self.color_indices:
+            # An equal color was registered, under another key.
+            return self._register_color(key, self.color_indices[color])
+
+        if self.palette is not None:
+            index = self.palette.nearest(color)
+        elif (
+            color is not None
+            and type(color) is ochre.Ansi256
+            and color.code < (self.indexed_colors or 0)
+        ):
+            index = color.code
+        else:
+            index = self._allocate_color()
+            self._color_objects[index] = color
+            self._idle_colors[index] = color
+            self.added_colors += 1
+
+        self.color_indices[color] = index
+        self._register_color(key, index)
+        if callback and self.on_add_color and index in self._color_objects:
             self.on_add_color(color, self)
 
     def add_pair(
         self, pair: ochre.ColorPair, callback: bool = True, allow_zero: bool = False
     ) -> None:
         """Register a color pair with the color manager."""
-        # We want background to be added first because curses tends to use the
-        # first (zeroth) color as the "unknown" color, and it is usually black.
-        self.add_color(pair.background, callback=callback)
-        self.add_color(pair.foreground, callback=callback)
-
-        if pair in self.pair_indices:
+        self._add_pair_colors(pair, callback)
+        key = (color_key(pair.foreground), color_key(pair.background))
+        if key not in self._pair_table and pair in self.pair_indices:
+            # An equal pair was registered, under other keys.
+            self._register_pair(key, pair, self.pair_indices[pair])
+        if key in self._pair_table:
+            index = self._pair_table[key][1]
+            if index in self._pair_lru:
+                self._pair_lru.move_to_end(index)
             return
 
         if not allow_zero and self.next_pair_index == 0:
             raise RuntimeError("Cannot redefine color pair 0")
 
-        self.pair_indices[pair] = self.next_pair_index
-        self.next_pair_index += 1
-        if callback and self.on_add_pair:
-            self.on_add_pair(pair, self)
+        self._insert_pair(key, pair, self._allocate_pair(), callback)
 
     def discard_color(self, color: Optional[ochre.Color]) -> None:
         """Unregister a color from the color manager."""
-        if color not in self.color_indices:
-            return
-
-        del self.color_indices[color]
+        if (index := self._color_keys.get(color_key(color))) is None:
+            if color not in self.color_indices:
+                return
+            index = self.color_indices[color]
+
+        self.color_indices.pop(color, None)
+        if index in self._color_objects:
+            # The index is about to be recycled, so no pair may keep using it.
+            entries = [*self._pair_lru.values(), *self._pinned_pairs.values()]
+            for pair, foreground, background in entries:
+                if index in (foreground, background):
+                    self.discard_pair(pair)
+        self._forget_color(index)
+        self._pair_table.clear()
+        self._pair_keys.clear()
+        self.generation += 1
 
     def discard_pair(self, pair: ochre.ColorPair) -> None:
         """Unregister a color pair from the color manager."""
-        if pair not in self.pair_indices:
+        key = (color_key(pair.foreground), color_key(pair.background))
+        if key in self._pair_table:
+            index = self._pair_table[key][1]
+        elif pair in self.pair_indices:
+            index = self.pair_indices[pair]
+        else:
             return
 
-        del self.pair_indices[pair]
+        self.pair_indices.pop(pair, None)
+        for key in self._pair_keys.pop(index, ()):
+            self._pair_table.pop(key, None)
+        entry = self._pair_lru.pop(index, None) or self._pinned_pairs.pop(index, None)
+        if entry is not None:
+            self._release_color(entry[1])
+            self._release_color(entry[2])
+        if index > 0:
+            self._free_pairs.append(index)
+        self.generation += 1
+
+    def preload(
+        self,
+        colors: Iterable[Optional[ochre.Color]],
+        pairs: Optional[Iterable[ochre.ColorPair]] = None,
+        pin: bool = False,
+    ) -> None:
+        """
+        Register a theme in one go: colors, and pairs of them.
+
+        Unless `pairs` are given, every pair of the colors is registered. Pinned
+        colors and pairs are never evicted (until `unpin` is called), so there
+        should be fewer of them than `max_colors` and `max_pairs`.
+        """
+        colors = list(colors)
+        for color in colors:
+            self.add_color(color)
+            if pin:
+                self._pin_color(color)
+        if pairs is None:
+            pairs = (
+                ochre.ColorPair(foreground, background)
+                for foreground in colors
+                for background in colors
+            )
+        for pair in pairs:
+            self.add_pair(pair)
+            if pin:
+                self._pin_pair(self[pair])
+
+    def unpin(self) -> None:
+        """Let all pinned colors and pairs be evicted again."""
+        self._pair_lru.update(self._pinned_pairs)
+        self._pinned_pairs.clear()
+        for color_index in self._pinned_colors:
+            self._release_color(color_index)
+        self._pinned_colors.clear()
+
+    def export_indices(self) -> dict[str, list[list[int]]]:
+        """
+        Return the indices given to colors and pairs, as lists of numbers.
+
+        Colors are listed by key (see `color_key`), and pairs by the keys of their
+        colors, along with their index and whether they are pinned.
+        """
+        return {
+            "colors": [
+                [key, color_index, color_index in self._pinned_colors]
+                for key, color_index in self._color_keys.items()
+                if color_index in self._color_objects
+            ],
+            "pairs": [
+                [
+                    color_key(pair.foreground),
+                    color_key(pair.background),
+                    pair_index,
+                    pair_index in self._pinned_pairs,
+                ]
+                for pair, pair_index in self.pair_indices.items()
+            ],
+        }
+
+    def import_indices(self, indices: Mapping[str, list[list[int]]]) -> None:
+        """
+        Register colors and pairs with the indices from `export_indices`.
+
+        Colors and pairs that are already registered, or whose index is taken, are
+        left out: they will be registered as usual when they are needed.
+        """
+        for key, color_index, pinned in indices.get("colors", ()):
+            if key not in self._color_keys and self._color_index_is_free(color_index):
+                color = key_color(key)
+                self._restore_color(color, key, color_index)
+                if pinned:
+                    self._pin_color(color)
+
+        taken = set(self.pair_indices.values())
+        for foreground, background, pair_index, pinned in indices.get("pairs", ()):
+            if (foreground, background) in self._pair_table or pair_index in taken:
+                continue
+            if self.max_pairs is not None and pair_index >= self.max_pairs:
+                continue
+            taken.add(pair_index)
+            pair = ochre.ColorPair(key_color(foreground), key_color(background))
+            self._restore_pair(pair, pair_index)
+            if pinned:
+                self._pin_pair(pair_index)
+
+    def _pin_color(self, color: Optional[ochre.Color]) -> None:
+        """Keep a color from being evicted."""
+        index = self._color_keys[color_key(color)]
+        if index in self._color_objects and index not in self._pinned_colors:
+            self._use_color(color)
+            self._pinned_colors.add(index)
+
+    def _pin_pair(self, index: int) -> None:
+        """Keep a color pair from being evicted."""
+        if (entry := self._pair_lru.pop(index, None)) is not None:
+            self._pinned_pairs[index] = entry
+
+    def _color_index_is_free(self, index: int) -> bool:
+        """Return whether a color index can be given to a restored color."""
+        if self.palette is not None:
+            return False
+        if index < (self.indexed_colors or 0) or index in self._color_objects:
+            return False
+        return self.max_colors is None or index < self.max_colors
+
+    def _restore_color(
+        self, color: Optional[ochre.Color], key: int, index: int
+    ) -> None:
+        """Register a color with a given index."""
+        if index in self._free_colors:
+            self._free_colors.remove(index)
+        start = max(self.next_color_index, self.indexed_colors or 0)
+        self._free_colors.extend(range(start, index))
+        self.next_color_index = max(self.next_color_index, index + 1)
+
+        self.color_indices[color] = index
+        self._register_color(key, index)
+        self._color_objects[index] = color
+        self._idle_colors[index] = color
+        self.added_colors += 1
+        if self.on_add_color:
+            self.on_add_color(color, self)
+
+    def _restore_pair(self, pair: ochre.ColorPair, index: int) -> None:
+        """Register a color pair with a given index."""
+        self._add_pair_colors(pair)
+        if index in self._free_pairs:
+            self._free_pairs.remove(index)
+        self._free_pairs.extend(range(max(1, self.next_pair_index), index))
+        self.next_pair_index = max(self.next_pair_index, index + 1)
+        key = (color_key(pair.foreground), color_key(pair.background))
+        self._insert_pair(key, pair, index)
+
+    def _add_pair_colors(self, pair: ochre.ColorPair, callback: bool = True) -> None:
+        """Register the colors of a color pair."""
+        # We want background to be added first because curses tends to use the
+        # first (zeroth) color as the "unknown" color, and it is usually black.
+        self.add_color(pair.background, callback=callback)
+        # Make sure the background is not evicted to make room for the foreground.
+        background = self._use_color(pair.background)
+        try:
+            self.add_color(pair.foreground, callback=callback)
+        finally:
+            self._release_color(background)
+
+    def _insert_pair(
+        self,
+        key: tuple[int, int],
+        pair: ochre.ColorPair,
+        index: int,
+        callback: bool = True,
+    ) -> None:
+        """Register a color pair with a free index, once its colors are registered."""
+        self.pair_indices[pair] = index
+        self._register_pair(key, pair, index)
+        foreground, background = (
+            self._use_color(pair.foreground),
+            self._use_color(pair.background),
+        )
+        if index != 0:
+            # Pair 0 is never evicted.
+            self._pair_lru[index] = (pair, foreground, background)
+        self.added_pairs += 1
+        if callback and self.on_add_pair:
+            self.on_add_pair(pair, self)
+
+    def _register_color(self, key: int, index: int) -> None:
+        """Look a color index up by a color key from now on."""
+        self._color_keys[key] = index
+        self._color_index_keys.setdefault(index, []).append(key)
+
+    def _register_pair(
+        self, key: tuple[int, int], pair: ochre.ColorPair, index: int
+    ) -> None:
+        """Look a color pair up by the keys of its colors from now on."""
+        self._pair_table[key] = (pair, index)
+        self._pair_keys.setdefault(index, []).append(key)
+
+    def _allocate_color(self) -> int:
+        """Return a free color index, evicting unused colors if needed."""
+        # Indices below are left to the indexed colors.
+        self.next_color_index = max(self.next_color_index, self.indexed_colors or 0)
+        if self.max_colors is None or self.next_color_index < self.max_colors:
+            self.next_color_index += 1
+            return self.next_color_index - 1
+
+        if self._free_colors:
+            return self._free_colors.pop()
+
+        while not self._idle_colors:
+            if not self._evict_pair():
+                raise RuntimeError("All colors are in use")
+        index, color = self._idle_colors.popitem(last=False)
+        self.color_indices.pop(color, None)
+        self._forget_color(index)
+        self.evicted_colors += 1
+        self.generation += 1
+        return self._free_colors.pop()
+
+    def _allocate_pair(self) -> int:
+        """Return a free color pair index, evicting old pairs if needed."""
+        if self.max_pairs is None or self.next_pair_index < self.max_pairs:
+            self.next_pair_index += 1
+            return self.next_pair_index - 1
+
+        if not self._free_pairs and not self._evict_pair():
+            raise RuntimeError("All color pairs are in use")
+        return self._free_pairs.pop()
+
+    def _evict_pair(self) -> bool:
+        """Evict the least recently used color pair, if there is one."""
+        if not self._pair_lru:
+            return False
+
+        index, (pair, foreground, background) = self._pair_lru.popitem(last=False)
+        self.pair_indices.pop(pair, None)
+        for key in self._pair_keys.pop(index, ()):
+            del self._pair_table[key]
+        self._release_color(foreground)
+        self._release_color(background)
+        self._free_pairs.append(index)
+        self.evicted_pairs += 1
+        self.generation += 1
+        return True
+
+    def _use_color(self, color: Optional[ochre.Color]) -> int:
+        """Count one more user of a color and return its index."""
+        index = self._color_keys[color_key(color)]
+        if index >= 0:
+            self._color_users[index] = self._color_users.get(index, 0) + 1
+            self._idle_colors.pop(index, None)
+        return index
+
+    def _release_color(self, index: int) -> None:
+        """Count one less user of a color, marking it idle if nobody uses it."""
+        if (users := self._color_users.get(index, 0) - 1) > 0:
+            self._color_users[index] = users
+        elif index in self._color_objects:
+            self._color_users.pop(index, None)
+            self._idle_colors[index] = self._color_objects[index]
+
+    def _forget_color(self, index: int) -> None:
+        """Drop the bookkeeping of a color index, recycling it if it was allocated."""
+        for key in self._color_index_keys.pop(index, ()):
+            del self._color_keys[key]
+        self._color_users.pop(index, None)
+        self._idle_colors.pop(index, None)
+        self._pinned_colors.discard(index)
+        if self._color_objects.pop(index, None) is not None:
+            self._free_colors.append(index)
 
     def add(
         self, value: Optional[ochre.Color | ochre.ColorPair], allow_zero: bool = False
@@ -136,9 +566,14 @@ class ColorManager(
     def __getitem__(self, value: Optional[ochre.Color | ochre.ColorPair]) -> int:
         """Return the index of a color or color pair."""
         if value is None or isinstance(value, ochre.Color):
+            if (index := self._color_keys.get(color_key(value))) is not None:
+                return index
             return self.color_indices[value]
 
         if isinstance(value, ochre.ColorPair):
+            key = (color_key(value.foreground), color_key(value.background))
+            if (entry := self._pair_table.get(key)) is not None:
+                return entry[1]
             return self.pair_indices[value]
 
         raise TypeError(f"Unsupported type: {type(value)}")
@@ -0,0 +1,85 @@
+"""Rendering several windows and pads in a single terminal update."""
+
+
+from __future__ import annotations
+
+import curses
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from . import Cusser
+
+
+@dataclass
+class Compositor:
+    """
+    A stack of windows and pads that are refreshed together.
+
+    `refresh` calls `noutrefresh` on every window, bottom to top (so that later
+    windows are drawn over earlier ones where they overlap), and then `doupdate`
+    once, so that the whole layout reaches the terminal in one go.
+
+    Windows created here share the color manager of their parent (or the global
+    one), while each keeps its own pen.
+    """
+
+    doupdate: Callable[[], None] = curses.doupdate
+
+    frames: int = field(default=0, init=False)
+
+    # The windows, along with the `noutrefresh` arguments of pads (the part of
+    # the pad to show and where to show it).
+    _layers: list[tuple[Cusser, tuple[int, ...]]] = field(
+        default_factory=list, init=False, repr=False
+    )
+
+    def add(self, cusser: Cusser, *viewport: int) -> Cusser:
+        """
+        Add a window on top of the others.
+
+        Pads must be given a viewport: the six arguments of their `noutrefresh`.
+        """
+        if any(layer is cusser for layer, _ in self._layers):
+            raise ValueError("The window was already added")
+        self._layers.append((cusser, viewport))
+        return cusser
+
+    def remove(self, cusser: Cusser) -> None:
+        """Remove a window."""
+        self._layers = [entry for entry in self._layers if entry[0] is not cusser]
+
+    def window(self, nlines: int, ncols: int, y: int, x: int, **kwargs: Any) -> Cusser:
+        """Create a window and add it on top of the others."""
+        return self.add(Cusser(curses.newwin(nlines, ncols, y, x), **kwargs))
+
+    def subwindow(
+        self, parent: Cusser, nlines: int, ncols: int, y: int, x: int, **kwargs: Any
+    ) -> Cusser:
+        """
+        Create a window sharing characters with a part of another one.
+
+        The position is relative to the parent, and the colors are shared with it.
+        """
+        kwargs.setdefault("color_manager", parent.color_manager)
+        return self.add(Cusser(parent.window.derwin(nlines, ncols, y, x), **kwargs))
+
+    def pad(
+        self, nlines: int, ncols: int, viewport: tuple[int, ...], **kwargs: Any
+    ) -> Cusser:
+        """Create a pad and add it on top of the others, showing a viewport."""
+        return self.add(Cusser(curses.newpad(nlines, ncols), **kwargs), *viewport)
+
+    def scroll(self, pad: Cusser, *viewport: int) -> None:
+        """Change the viewport of a pad."""
+        for i, (cusser, _) in enumerate(self._layers):
+            if cusser is pad:
+                self._layers[i] = (pad, viewport)
+                return
+        raise ValueError("The pad was not added")
+
+    def refresh(self) -> None:
+        """Update the terminal with the contents of all windows at once."""
+        for cusser, viewport in self._layers:
+            cusser.noutrefresh(*viewport)
+        self.doupdate()
+        self.frames += 1
@@ -0,0 +1,190 @@
+"""Parsing large documents ahead of time, in parallel."""
+
+
+from __future__ import annotations
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+from typing import Iterable, Iterator, Optional, Text, Tuple
+
+from stransi import SetAttribute, SetColor
+from stransi.attribute import Attribute
+from stransi.color import ColorRole
+
+from .color_manager import color_key
+from .pen import Pen
+from .tokenizer import tokenize
+
+# A style: attributes and the keys (see `color_key`) of the foreground and
+# background colors. Plain integers make parsed documents cheap to pickle.
+Style = Tuple[int, int, int]
+# A piece of text with the same style: attributes, foreground, background and text.
+Run = Tuple[int, int, int, Text]
+Line = Tuple[Run, ...]
+
+DEFAULT_STYLE: Style = (0, -1, -1)
+
+# The attribute bits a chunk can change.
+ALL_ATTRS = reduce(or_, Pen.ON_ATTR_MAP.values())
+# The color key of a color that is inherited from the previous chunk.
+INHERIT = -2
+
+# A style that is partly inherited from the previous chunk: the attribute bits
+# that are known, the attributes, and the foreground and background color keys
+# (or `INHERIT`).
+_Partial = Tuple[int, int, int, int]
+# How a chunk was parsed, assuming it starts with the default style: its lines,
+# the runs whose style depends on the previous chunks (as line and run indices
+# along with their partial style), and the partial style at its end.
+_Chunk = Tuple[list, list, _Partial]
+
+
+@dataclass
+class Document:
+    """
+    A document parsed into lines of equally styled runs, ready to be rendered.
+
+    Pass it to `Cusser.adddocument` to render it without parsing it again.
+    """
+
+    lines: list[Line]
+    # The style at the end of the document, which would apply to more text.
+    style: Style = DEFAULT_STYLE
+
+    def __len__(self) -> int:
+        """Return the number of lines."""
+        return len(self.lines)
+
+
+def parse_document(
+    text: Text,
+    workers: Optional[int] = None,
+    chunk_size: int = 1 << 20,
+    executor: Optional[Executor] = None,
+) -> Document:
+    """
+    Parse a document with ANSI escape codes into lines of styled runs.
+
+    The document is split at line boundaries into chunks of about `chunk_size`
+    characters, which are parsed in a process pool of `workers` processes (or an
+    `executor`, if given), so that parsing scales with the number of cores. With
+    a single worker, chunks are parsed in this process. Attributes and colors
+    carry over from chunk to chunk, as if the document was parsed in one go.
+
+    Lines are split as in `Cusser.adddocument`. Cursor movements and clears are
+    ignored.
+    """
+    chunks = list(_split(text, chunk_size))
+    results: Iterable[_Chunk]
+    if executor is not None:
+        results = executor.map(_parse_chunk, chunks)
+    elif workers == 1 or len(chunks) <= 1:
+        results = map(_parse_chunk, chunks)
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(_parse_chunk, chunks))
+
+    lines: list[Line] = []
+    style = DEFAULT_STYLE
+    for chunk in results:
+        parsed = _finish(chunk, style)
+        lines.extend(parsed.lines)
+        style = parsed.style
+    return Document(lines, style)
+
+
+def parse_lines(text: Text, style: Style = DEFAULT_STYLE) -> Document:
+    """Parse a few lines with ANSI escape codes, starting with a style."""
+    return _finish(_parse_chunk(text), style)
+
+
+def _finish(chunk: _Chunk, style: Style) -> Document:
+    """Return a parsed chunk, given the style at its start."""
+    lines, fixups, end = chunk
+    if style != DEFAULT_STYLE:
+        _resolve(lines, fixups, style)
+    return Document(lines, _inherit(end, style))
+
+
+def _split(text: Text, size: int) -> Iterator[Text]:
+    """Split text after the first newline following every `size` characters."""
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start + size) + 1 or len(text)
+        yield text[start:end]
+        start = end
+
+
+def _parse_chunk(text: Text) -> _Chunk:  # noqa: C901
+    """
+    Parse a chunk of a document, not knowing the style at its start.
+
+    Until an attribute bit or a color is set, it is inherited. Runs are styled as
+    if the chunk started with the default style, which is usually the case, and
+    those that inherit something are listed, to be fixed otherwise.
+    """
+    known, attrs, foreground, background = 0, 0, INHERIT, INHERIT
+    lines: list[Line] = []
+    fixups: list[tuple[int, int, _Partial]] = []
+    last_partial: Optional[_Partial] = None
+
+    lines_text = text.split("\n")
+    if text.endswith("\n"):
+        lines_text.pop()
+    for line in lines_text:
+        runs: list[Run] = []
+        for instruction in tokenize(line.rstrip("\r")):
+            if isinstance(instruction, Text):
+                partial = (known, attrs, foreground, background)
+                if runs and partial == last_partial:
+                    runs[-1] = (*runs[-1][:3], runs[-1][3] + instruction)
+                    continue
+                if known != ALL_ATTRS or INHERIT in (foreground, background):
+                    fixups.append((len(lines), len(runs), partial))
+                runs.append((*_inherit(partial, DEFAULT_STYLE), instruction))
+                last_partial = partial
+            elif isinstance(instruction, SetAttribute):
+                attribute = instruction.attribute
+                if attribute == Attribute.NORMAL:
+                    known, attrs, foreground, background = ALL_ATTRS, 0, -1, -1
+                elif attribute in Pen.ON_ATTR_MAP:
+                    known |= Pen.ON_ATTR_MAP[attribute]
+                    attrs |= Pen.ON_ATTR_MAP[attribute]
+                elif attribute in Pen.OFF_ATTR_MAP:
+                    known |= Pen.OFF_ATTR_MAP[attribute]
+                    attrs &= ~Pen.OFF_ATTR_MAP[attribute]
+                else:
+                    raise ValueError(f"Unsupported attribute: {attribute}")
+            elif isinstance(instruction, SetColor):
+                if instruction.role == ColorRole.FOREGROUND:
+                    foreground = color_key(instruction.color)
+                else:
+                    background = color_key(instruction.color)
+        lines.append(tuple(runs))
+        last_partial = None
+    return lines, fixups, (known, attrs, foreground, background)
+
+
+def _inherit(partial: _Partial, style: Style) -> Style:
+    """Return a partial style, with its unknown parts taken from another style."""
+    known, attrs, foreground, background = partial
+    return (
+        style[0] & ~known | attrs,
+        style[1] if foreground == INHERIT else foreground,
+        style[2] if background == INHERIT else background,
+    )
+
+
+def _resolve(
+    lines: list[Line], fixups: list[tuple[int, int, _Partial]], style: Style
+) -> None:
+    """Restyle the runs that inherit from the style at the start of their chunk."""
+    changed: dict[int, list[Run]] = {}
+    for y, i, partial in fixups:
+        if (runs := changed.get(y)) is None:
+            runs = changed[y] = list(lines[y])
+        runs[i] = (*_inherit(partial, style), runs[i][3])
+    for y, runs in changed.items():
+        lines[y] = tuple(runs)
@@ -0,0 +1,223 @@
+"""A window that lives in memory only, for rendering without a terminal."""
+
+
+from __future__ import annotations
+
+import curses
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Text
+
+import ochre
+
+from .color_manager import ColorManager, curses_rgb
+
+
+def _blank_row(cols: int) -> tuple[list[Text], array[int]]:
+    """Return the characters and attributes of an empty row."""
+    return [" "] * cols, array("L", [curses.A_NORMAL]) * cols
+
+
+@dataclass
+class HeadlessWindow:
+    """
+    An in-memory stand-in for the curses windows used by `Cusser`.
+
+    It implements the drawing calls `Cusser` issues (`addstr`, `attron`,
+    `attroff`, `attrset`, `move`, `getyx`, `erase`, `clrtobot`, `clrtoeol`...) on
+    a grid of characters and attribute words, one character list and one
+    attribute array per row, which can then be inspected with `instr`, `inch` or
+    `text`. No terminal is needed, so it is fast and works anywhere:
+
+        stdscr = Cusser.headless(24, 80)
+
+    Color and pair definitions are recorded in `colors` and `pairs` by the
+    `on_add_color` and `on_add_pair` hooks, which stand in for those of the
+    curses color manager.
+    """
+
+    lines: int = 24
+    cols: int = 80
+
+    colors: dict[int, tuple[int, int, int]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    pairs: dict[int, tuple[int, int]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    _y: int = field(default=0, init=False, repr=False)
+    _x: int = field(default=0, init=False, repr=False)
+    _attr: int = field(default=curses.A_NORMAL, init=False, repr=False)
+    _chars: list[list[Text]] = field(init=False, repr=False)
+    _attrs: list[array[int]] = field(init=False, repr=False)
+    # Rows changed since the dirty set was last cleared.
+    _dirty: set[int] = field(default_factory=set, init=False, repr=False)
+
+    TAB_SIZE = 8
+
+    def __post_init__(self) -> None:
+        """Create an empty grid."""
+        rows = [_blank_row(self.cols) for _ in range(self.lines)]
+        self._chars = [chars for chars, _ in rows]
+        self._attrs = [attrs for _, attrs in rows]
+        self._dirty = set(range(self.lines))
+
+    def color_manager(self, **kwargs: Any) -> ColorManager:
+        """Return a color manager that records its definitions in this window."""
+        kwargs.setdefault("max_pairs", 256)
+        kwargs.setdefault("indexed_colors", 16)
+        return ColorManager(
+            on_add_color=self.on_add_color, on_add_pair=self.on_add_pair, **kwargs
+        )
+
+    def on_add_color(self, color: ochre.Color, manager: ColorManager) -> None:
+        """Record the definition of a color, as `curses.init_color` would."""
+        self.colors[manager[color]] = curses_rgb(color)
+
+    def on_add_pair(self, pair: ochre.ColorPair, manager: ColorManager) -> None:
+        """Record the definition of a color pair, as `curses.init_pair` would."""
+        self.pairs[manager[pair]] = (
+            manager[pair.foreground],
+            manager[pair.background],
+        )
+
+    def getmaxyx(self) -> tuple[int, int]:
+        """Return the size of the screen."""
+        return self.lines, self.cols
+
+    def getyx(self) -> tuple[int, int]:
+        """Return the cursor position."""
+        return self._y, self._x
+
+    def move(self, y: int, x: int) -> None:
+        """Move the cursor."""
+        if not (0 <= y < self.lines and 0 <= x < self.cols):
+            raise curses.error("wmove() returned ERR")
+        self._y, self._x = y, x
+
+    def attron(self, attr: int) -> None:
+        """Turn attributes on."""
+        self._attr |= attr
+
+    def attroff(self, attr: int) -> None:
+        """Turn attributes off."""
+        self._attr &= ~attr
+
+    def attrset(self, attr: int) -> None:
+        """Set the attributes."""
+        self._attr = attr
+
+    def addstr(self, *args: Any) -> None:
+        """Add a string, as in `addstr([y, x,] text[, attr])`."""
+        if len(args) >= 3:
+            self.move(args[0], args[1])
+            args = args[2:]
+
+        if len(args) == 2:
+            saved, self._attr = self._attr, args[1]
+            try:
+                self._addstr(args[0])
+            finally:
+                self._attr = saved
+        else:
+            self._addstr(args[0])
+
+    def erase(self) -> None:
+        """Clear the screen and move the cursor home."""
+        for y in range(self.lines):
+            self._clear_row(y, 0)
+        self._y = self._x = 0
+
+    def clear(self) -> None:
+        """Clear the screen and move the cursor home."""
+        self.erase()
+
+    def clrtoeol(self) -> None:
+        """Clear from the cursor to the end of the line."""
+        self._clear_row(self._y, self._x)
+
+    def clrtobot(self) -> None:
+        """Clear from the cursor to the end of the screen."""
+        self._clear_row(self._y, self._x)
+        for y in range(self._y + 1, self.lines):
+            self._clear_row(y, 0)
+
+    def instr(self, y: int, x: int, n: int) -> bytes:
+        """Return the characters in a stretch of a row, like curses does."""
+        return "".join(self._chars[y][x : x + n]).encode()  # noqa: E203
+
+    def inch(self, y: int, x: int) -> int:
+        """Return the character and attributes of a cell, like curses does."""
+        return ord(self._chars[y][x]) | self._attrs[y][x]
+
+    def text(self) -> Text:
+        """Return the characters on the screen, without trailing blanks."""
+        return "\n".join("".join(chars).rstrip() for chars in self._chars)
+
+    def refresh(self, *args: int) -> None:
+        """Do nothing, as there is no terminal."""
+
+    def noutrefresh(self, *args: int) -> None:
+        """Do nothing, as there is no terminal."""
+
+    def getch(self) -> int:
+        """Return -1, as there is no input."""
+        return -1
+
+    def nodelay(self, flag: bool) -> None:
+        """Do nothing, as there is no input to wait for."""
+
+    def _addstr(self, text: Text) -> None:
+        """Add a string at the cursor with the current attributes."""
+        for i, line in enumerate(text.split("\n")):
+            if i:
+                self._newline()
+            if "\r" in line or "\t" in line or "\b" in line:
+                for char in line:
+                    self._addch(char)
+            else:
+                self._put(line)
+
+    def _addch(self, char: Text) -> None:
+        """Add a single (possibly control) character."""
+        if char == "\r":
+            self._x = 0
+        elif char == "\b":
+            self._x = max(self._x - 1, 0)
+        elif char == "\t":
+            self._put(" " * (self.TAB_SIZE - self._x % self.TAB_SIZE))
+        else:
+            self._put(char)
+
+    def _put(self, text: Text) -> None:
+        """Write printable text at the cursor, wrapping at the end of lines."""
+        while text:
+            y, x = self._y, self._x
+            n = min(len(text), self.cols - x)
+            self._chars[y][x : x + n] = text[:n]  # noqa: E203
+            self._attrs[y][x : x + n] = array("L", [self._attr]) * n  # noqa: E203
+            self._dirty.add(y)
+            text = text[n:]
+            if x + n < self.cols:
+                self._x = x + n
+            elif y + 1 < self.lines:
+                self._y, self._x = y + 1, 0
+            else:
+                # Like curses, write the last cell but fail to move past it.
+                self._x = self.cols - 1
+                raise curses.error("addwstr() returned ERR")
+
+    def _newline(self) -> None:
+        """Clear the rest of the line and move to the start of the next one."""
+        self.clrtoeol()
+        if self._y + 1 >= self.lines:
+            raise curses.error("addwstr() returned ERR")
+        self._y, self._x = self._y + 1, 0
+
+    def _clear_row(self, y: int, x: int) -> None:
+        """Blank a row from a column onwards."""
+        n = self.cols - x
+        self._chars[y][x:] = [" "] * n
+        self._attrs[y][x:] = array("L", [curses.A_NORMAL]) * n
+        self._dirty.add(y)
@@ -0,0 +1,256 @@
+"""An event loop for interactive programs: keys, timers and resizes."""
+
+
+from __future__ import annotations
+
+import curses
+import heapq
+import itertools
+import os
+import selectors
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Optional, Union
+
+if TYPE_CHECKING:
+    from . import Cusser
+    from .compositor import Compositor
+
+_SIGWINCH = getattr(signal, "SIGWINCH", None)
+
+
+@dataclass(order=True)
+class Timer:
+    """A function called after a delay, and then every `interval` seconds if set."""
+
+    deadline: float
+    _order: int = field(repr=False)
+    callback: Callable[[], Any] = field(compare=False)
+    interval: Optional[float] = field(default=None, compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+    def cancel(self) -> None:
+        """Stop the timer."""
+        self.cancelled = True
+
+
+@dataclass
+class EventLoop:
+    """
+    Wait for keys, timers and terminal resizes, and redraw after each batch.
+
+    The loop sleeps in `selectors` until the terminal input is readable, the
+    next timer is due, or the terminal is resized, so it takes no CPU time while
+    idle. Keys are read without blocking and dispatched to the handlers bound
+    with `bind`, or to `on_key`. Timers are set with `call_later` and
+    `call_every`.
+
+    Handlers call `invalidate` when the screen has to change. Once every pending
+    event is handled, `draw` is called (once, however many events there were),
+    and the window (or the `compositor`, if there is one) is refreshed with a
+    single `doupdate`. Resizes always invalidate the screen.
+
+    Once curses is initialized, it handles SIGWINCH itself (with a handler that
+    couldn't be put back if it was replaced), and reports resizes as
+    `KEY_RESIZE` keys, which are checked for every `resize_interval` seconds.
+    Otherwise, SIGWINCH wakes the loop up through `signal.set_wakeup_fd`, which
+    only works when the loop runs in the main thread.
+    """
+
+    cusser: Cusser
+    draw: Callable[[], Any] = lambda: None
+    on_key: Optional[Callable[[int], Any]] = None
+    on_resize: Optional[Callable[[int, int], Any]] = None
+    compositor: Optional[Compositor] = None
+    doupdate: Callable[[], None] = curses.doupdate
+    # The file descriptor of the terminal input.
+    input: int = 0
+    # The time source of the timers, in seconds.
+    clock: Callable[[], float] = time.monotonic
+    resize_interval: float = 0.1
+
+    frames: int = field(default=0, init=False)
+    keys: int = field(default=0, init=False)
+
+    _bindings: dict[int, Callable[[int], Any]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _timers: list[Timer] = field(default_factory=list, init=False, repr=False)
+    _order: Any = field(default_factory=itertools.count, init=False, repr=False)
+    _running: bool = field(default=False, init=False, repr=False)
+    _dirty: bool = field(default=True, init=False, repr=False)
+    # Whether resizes are checked for as keys, rather than woken up for.
+    _polling: bool = field(default=False, init=False, repr=False)
+
+    def bind(self, key: Union[int, str], handler: Callable[[int], Any]) -> None:
+        """Call a function with a key (a character or a curses key code) on input."""
+        self._bindings[ord(key) if isinstance(key, str) else key] = handler
+
+    def call_later(self, delay: float, callback: Callable[[], Any]) -> Timer:
+        """Call a function once, after a delay in seconds."""
+        return self._schedule(Timer(self.clock() + delay, 0, callback))
+
+    def call_every(self, interval: float, callback: Callable[[], Any]) -> Timer:
+        """Call a function every `interval` seconds, until its timer is cancelled."""
+        timer = Timer(self.clock() + interval, 0, callback, interval)
+        return self._schedule(timer)
+
+    def invalidate(self) -> None:
+        """Redraw the screen once the pending events are handled."""
+        self._dirty = True
+
+    def stop(self) -> None:
+        """Stop the loop once the current event is handled (and drawn, if needed)."""
+        self._running = False
+
+    def run(self) -> None:
+        """Handle events and redraw the screen until `stop` is called."""
+        window = self.cusser.window
+        window.nodelay(True)
+        selector = selectors.DefaultSelector()
+        selector.register(self.input, selectors.EVENT_READ)
+        restore = self._handle_resizes(selector)
+        self._running = True
+        try:
+            while True:
+                if self._dirty:
+                    self._render()
+                if not self._running:
+                    break
+                self._dispatch(selector.select(self._timeout()))
+                self._run_timers()
+        finally:
+            restore()
+            selector.close()
+            window.nodelay(False)
+
+    def _dispatch(self, events: list[tuple[selectors.SelectorKey, int]]) -> None:
+        """Handle the input and signals that woke the loop up."""
+        for key, _ in events:
+            if key.fd == self.input:
+                self._read_keys()
+            elif _SIGWINCH is not None and _SIGWINCH in _drain(key.fd):
+                self._resize()
+        if self._polling and not events:
+            # Curses reports resizes as keys, even without any input.
+            self._read_keys()
+
+    def _schedule(self, timer: Timer) -> Timer:
+        """Add a timer to the queue."""
+        timer._order = next(self._order)
+        heapq.heappush(self._timers, timer)
+        return timer
+
+    def _timeout(self) -> Optional[float]:
+        """Return how long to wait for the next timer, or None if there is none."""
+        while self._timers and self._timers[0].cancelled:
+            heapq.heappop(self._timers)
+        timeout = self.resize_interval if self._polling else None
+        if self._timers:
+            delay = max(0.0, self._timers[0].deadline - self.clock())
+            timeout = delay if timeout is None else min(delay, timeout)
+        return timeout
+
+    def _run_timers(self) -> None:
+        """Call the functions of the timers that are due."""
+        now = self.clock()
+        while self._running and self._timers and self._timers[0].deadline <= now:
+            timer = heapq.heappop(self._timers)
+            if timer.cancelled:
+                continue
+            if timer.interval is not None:
+                # Skip the ticks that were missed, rather than calling in a burst.
+                timer.deadline = max(timer.deadline + timer.interval, now)
+                self._schedule(timer)
+            timer.callback()
+
+    def _read_keys(self) -> None:
+        """Dispatch all the keys that are available."""
+        window = self.cusser.window
+        while self._running and (key := window.getch()) != -1:
+            self.keys += 1
+            if key == curses.KEY_RESIZE:
+                self._resize()
+            elif (handler := self._bindings.get(key, self.on_key)) is not None:
+                handler(key)
+
+    def _resize(self) -> None:
+        """Let curses know about the new terminal size, and redraw."""
+        try:
+            size = os.get_terminal_size(self.input)
+        except OSError:
+            # Not a terminal: the window size is all there is to go by.
+            lines, cols = self.cusser.getmaxyx()
+        else:
+            lines, cols = size.lines, size.columns
+            if curses.is_term_resized(lines, cols):
+                curses.resizeterm(lines, cols)
+        if self.on_resize is not None:
+            self.on_resize(lines, cols)
+        self._dirty = True
+
+    def _render(self) -> None:
+        """Draw and update the screen once."""
+        self._dirty = False
+        self.draw()
+        if self.compositor is not None:
+            self.compositor.refresh()
+        else:
+            self.cusser.noutrefresh()
+            self.doupdate()
+        self.frames += 1
+
+    def _handle_resizes(self, selector: selectors.BaseSelector) -> Callable[[], None]:
+        """
+        Wake the loop up on SIGWINCH, or check for resizes as keys.
+
+        Return a function that undoes it.
+        """
+        self._polling = _SIGWINCH is not None and (
+            _curses_initialized() or signal.getsignal(_SIGWINCH) is None
+        )
+        if (
+            _SIGWINCH is None
+            or self._polling
+            or threading.current_thread() is not threading.main_thread()
+        ):
+            return lambda: None
+
+        read, write = os.pipe()
+        os.set_blocking(read, False)
+        os.set_blocking(write, False)
+        selector.register(read, selectors.EVENT_READ)
+        # The handler does nothing: the wakeup byte is what matters.
+        previous_handler = signal.signal(_SIGWINCH, lambda *_: None)
+        # Every signal is written there, by number.
+        previous_fd = signal.set_wakeup_fd(write, warn_on_full_buffer=False)
+
+        def restore() -> None:
+            signal.set_wakeup_fd(previous_fd)
+            signal.signal(_SIGWINCH, previous_handler)
+            os.close(read)
+            os.close(write)
+
+        return restore
+
+
+def _curses_initialized() -> bool:
+    """Return whether curses was initialized (with `initscr`)."""
+    try:
+        curses.isendwin()
+    except curses.error:
+        return False
+    return True
+
+
+def _drain(fd: int) -> bytes:
+    """Read everything available from a non-blocking file descriptor."""
+    data = b""
+    try:
+        while chunk := os.read(fd, 512):
+            data += chunk
+    except BlockingIOError:
+        pass
+    return data
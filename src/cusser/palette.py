@@ -0,0 +1,133 @@
+"""Fixed terminal palettes and nearest color lookups."""
+
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from operator import index
+from typing import Optional, Sequence, Tuple
+
+import ochre
+from ochre import ansi256
+from ochre.colorsys import hex_to_hex
+
+RGB = Tuple[int, int, int]
+
+# A k-d tree node: the palette entry (color and index), the split axis and the
+# subtrees with smaller and larger coordinates along that axis.
+Node = Tuple[Tuple[RGB, int], int, Optional["Node"], Optional["Node"]]
+
+
+def pack(color: ochre.Color) -> int:
+    """
+    Return a color as a packed 24-bit RGB value, like `operator.index`.
+
+    Common color types are converted directly, which is much cheaper.
+    """
+    if type(color) is ochre.RGB:
+        return (
+            int(color.red * 255) << 16
+            | int(color.green * 255) << 8
+            | int(color.blue * 255)
+        )
+    if type(color) is ochre.Hex:
+        return hex_to_hex(color.hex_code)
+    return index(color)
+
+
+def _unpack(value: int) -> RGB:
+    """Return the red, green and blue components of a packed 24-bit color."""
+    return value >> 16, (value >> 8) & 0xFF, value & 0xFF
+
+
+def _build(entries: list[tuple[RGB, int]], depth: int = 0) -> Optional[Node]:
+    """Build a k-d tree over palette entries."""
+    if not entries:
+        return None
+
+    axis = depth % 3
+    entries = sorted(entries, key=lambda entry: (entry[0][axis], entry[1]))
+    middle = len(entries) // 2
+    return (
+        entries[middle],
+        axis,
+        _build(entries[:middle], depth + 1),
+        _build(entries[middle + 1 :], depth + 1),  # noqa: E203
+    )
+
+
+@dataclass
+class Palette:
+    """
+    A fixed set of terminal colors, for terminals that can't define new ones.
+
+    Colors are given as packed 24-bit RGB values, in palette order. Nearest color
+    lookups go through a k-d tree and are memoized.
+    """
+
+    colors: Sequence[int]
+
+    memo_size: int = 65536
+
+    _tree: Optional[Node] = field(init=False, repr=False, compare=False)
+    _memo: dict[int, int] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        """Index the palette colors."""
+        self._tree = _build([(_unpack(c), i) for i, c in enumerate(self.colors)])
+
+    @staticmethod
+    def xterm(n: int = 256) -> Palette:
+        """Return the first `n` colors of the standard xterm palette."""
+        return Palette([int(c[1:], 16) for c in ansi256.colors[:n]])
+
+    def __len__(self) -> int:
+        """Return the number of colors in the palette."""
+        return len(self.colors)
+
+    def nearest(self, color: ochre.Color) -> int:
+        """Return the index of the palette color closest to a color."""
+        if type(color) is ochre.Ansi256 and color.code < len(self.colors):
+            return color.code
+
+        value = pack(color)
+        try:
+            return self._memo[value]
+        except KeyError:
+            pass
+
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        result = self._memo[value] = self._search(_unpack(value))
+        return result
+
+    def _search(self, target: RGB) -> int:
+        """Find the palette color closest to a color in RGB space."""
+        best_distance, best_index = 3 * 256**2, -1
+        # Nodes to visit, with a lower bound of the distance to their colors.
+        stack: list[tuple[Optional[Node], int]] = [(self._tree, 0)]
+        while stack:
+            node, bound = stack.pop()
+            if node is None or bound > best_distance:
+                continue
+
+            (point, i), axis, smaller, larger = node
+            distance = (
+                (target[0] - point[0]) ** 2
+                + (target[1] - point[1]) ** 2
+                + (target[2] - point[2]) ** 2
+            )
+            if distance < best_distance or (
+                distance == best_distance and i < best_index
+            ):
+                best_distance, best_index = distance, i
+
+            delta = target[axis] - point[axis]
+            near, far = (smaller, larger) if delta < 0 else (larger, smaller)
+            # The far side is pushed first so that it is visited last, when the
+            # best distance so far is as small as it gets.
+            stack.append((far, max(bound, delta * delta)))
+            stack.append((near, bound))
+        return best_index
@@ -0,0 +1,103 @@
+"""The drawing state (attributes and colors) of a window."""
+
+
+from __future__ import annotations
+
+import curses
+from dataclasses import dataclass, field
+from typing import Optional
+
+import ochre
+from stransi.attribute import Attribute
+from stransi.color import ColorRole
+
+from .color_manager import ColorManager
+
+
+def color_pair(index: int) -> int:
+    """
+    Return the attribute word of a color pair, like `curses.color_pair`.
+
+    Unlike the latter, this works before (or without) `curses.start_color`.
+    """
+    return (index << 8) & curses.A_COLOR
+
+
+@dataclass
+class Pen:
+    """
+    The text attributes and colors that apply to the next piece of text.
+
+    Changes are only accumulated here: the resulting curses attribute word is
+    computed (and cached) when it is actually needed.
+    """
+
+    attrs: int = curses.A_NORMAL
+    foreground: Optional[ochre.Color] = None
+    background: Optional[ochre.Color] = None
+
+    _word: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    _generation: int = field(default=0, init=False, repr=False, compare=False)
+
+    ON_ATTR_MAP = {
+        Attribute.BOLD: curses.A_BOLD,
+        Attribute.DIM: curses.A_DIM,
+        Attribute.ITALIC: curses.A_ITALIC,
+        Attribute.UNDERLINE: curses.A_UNDERLINE,
+        Attribute.BLINK: curses.A_BLINK,
+        Attribute.REVERSE: curses.A_REVERSE,
+        Attribute.HIDDEN: curses.A_INVIS,
+    }
+
+    OFF_ATTR_MAP = {
+        Attribute.NEITHER_BOLD_NOR_DIM: curses.A_BOLD | curses.A_DIM,
+        Attribute.NOT_ITALIC: curses.A_ITALIC,
+        Attribute.NOT_UNDERLINE: curses.A_UNDERLINE,
+        Attribute.NOT_BLINK: curses.A_BLINK,
+        Attribute.NOT_REVERSE: curses.A_REVERSE,
+        Attribute.NOT_HIDDEN: curses.A_INVIS,
+    }
+
+    def set_attribute(self, attribute: Attribute) -> None:
+        """Turn an attribute on or off."""
+        if attribute == Attribute.NORMAL:
+            attrs = curses.A_NORMAL
+            if self.foreground is not None or self.background is not None:
+                self.foreground = self.background = None
+                self._word = None
+        elif attribute in self.ON_ATTR_MAP:
+            attrs = self.attrs | self.ON_ATTR_MAP[attribute]
+        elif attribute in self.OFF_ATTR_MAP:
+            attrs = self.attrs & ~self.OFF_ATTR_MAP[attribute]
+        else:
+            raise ValueError(f"Unsupported attribute: {attribute}")
+
+        if attrs != self.attrs:
+            self.attrs = attrs
+            self._word = None
+
+    def set_color(self, role: ColorRole, color: Optional[ochre.Color]) -> None:
+        """Set the foreground or background color."""
+        if role == ColorRole.FOREGROUND:
+            if color is not self.foreground:
+                self.foreground = color
+                self._word = None
+        elif role == ColorRole.BACKGROUND:
+            if color is not self.background:
+                self.background = color
+                self._word = None
+        else:
+            raise ValueError(f"Unknown color role {role}")
+
+    @property
+    def pair(self) -> ochre.ColorPair:
+        """Return the current colors as a color pair."""
+        return ochre.ColorPair(self.foreground, self.background)
+
+    def word(self, color_manager: ColorManager) -> int:
+        """Return the curses attribute word, registering the color pair if needed."""
+        if self._word is None or self._generation != color_manager.generation:
+            index = color_manager.pair_index(self.foreground, self.background)
+            self._word = self.attrs | color_pair(index)
+            self._generation = color_manager.generation
+        return self._word
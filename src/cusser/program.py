@@ -0,0 +1,119 @@
+"""Render programs: ANSI strings compiled once and replayed many times."""
+
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from string import Formatter
+from typing import Any, Iterable, Text, Tuple
+
+from stransi import SetAttribute, SetClear, SetColor, SetCursor
+from stransi.cursor import CursorMove
+from stransi.instruction import Instruction
+
+from .color_manager import ColorManager
+from .pen import Pen
+
+# Operation codes. Each operation is an `(opcode, argument)` tuple.
+TEXT = 0  # argument: the text to add
+FORMAT = 1  # argument: a format string to fill with values and then add
+ATTRSET = 2  # argument: the full curses attribute word (color pair included)
+CLEAR = 3  # argument: a `stransi.clear.Clear` region
+MOVE = 4  # argument: a `stransi.cursor.CursorMove`
+
+Operation = Tuple[int, Any]
+
+
+@dataclass
+class Program:
+    """
+    A flat sequence of curses operations compiled from an ANSI string.
+
+    Attribute masks and color pair numbers are resolved at compile time, so
+    replaying a program only issues the curses calls themselves. Programs always
+    start from normal attributes and default colors.
+
+    Text may contain `str.format` replacement fields, which are filled in when
+    the program is run (literal braces must therefore be doubled).
+
+    If the color manager gives up color pairs after compilation (see
+    `ColorManager.generation`), the program must be relinked before running.
+    """
+
+    ops: tuple[Operation, ...]
+    pen: Pen
+    word: int
+    generation: int
+    # The pen behind each `ATTRSET` operation, by operation position.
+    links: tuple[tuple[int, Pen], ...] = ()
+
+    @staticmethod
+    def compile(  # noqa: C901
+        instructions: Iterable[Instruction | Text], color_manager: ColorManager
+    ) -> Program:
+        """Compile instructions, registering their color pairs with the manager."""
+        ops: list[Operation] = []
+        links: list[tuple[int, Pen]] = []
+        pen = Pen()
+        word = None
+        for instruction in instructions:
+            if isinstance(instruction, Text):
+                if not instruction:
+                    continue
+                if (new_word := pen.word(color_manager)) != word:
+                    links.append((len(ops), replace(pen)))
+                    ops.append((ATTRSET, new_word))
+                    word = new_word
+                ops.append(_text_operation(instruction))
+            elif isinstance(instruction, SetAttribute):
+                pen.set_attribute(instruction.attribute)
+            elif isinstance(instruction, SetColor):
+                pen.set_color(instruction.role, instruction.color)
+            elif isinstance(instruction, SetClear):
+                ops.append((CLEAR, instruction.region))
+            elif isinstance(instruction, SetCursor):
+                _add_move(ops, instruction.move)
+            else:
+                raise NotImplementedError(instruction)
+
+        # Leave the window with the final attributes, like `Cusser.addstr` would.
+        if (new_word := pen.word(color_manager)) != word:
+            links.append((len(ops), replace(pen)))
+            ops.append((ATTRSET, new_word))
+
+        return Program(
+            ops=tuple(ops),
+            pen=pen,
+            word=new_word,
+            generation=color_manager.generation,
+            links=tuple(links),
+        )
+
+    def relink(self, color_manager: ColorManager) -> None:
+        """Resolve the color pairs again, registering those that were evicted."""
+        ops = list(self.ops)
+        for position, pen in self.links:
+            ops[position] = (ATTRSET, pen.word(color_manager))
+        self.ops = tuple(ops)
+        self.word = self.pen.word(color_manager)
+        self.generation = color_manager.generation
+
+
+def _text_operation(text: Text) -> Operation:
+    """Return the operation that adds a piece of text."""
+    if any(field is not None for _, field, _, _ in Formatter().parse(text)):
+        return (FORMAT, text)
+    return (TEXT, text.replace("{{", "{").replace("}}", "}"))
+
+
+def _add_move(ops: list[Operation], move: CursorMove) -> None:
+    """Add a cursor movement, merging it with a previous one."""
+    if ops and ops[-1][0] == MOVE:
+        previous = ops.pop()[1]
+        if move.relative:
+            move = CursorMove(
+                previous.x + move.x, previous.y + move.y, previous.relative
+            )
+    if move.relative and not (move.x or move.y):
+        return
+    ops.append((MOVE, move))
@@ -0,0 +1,197 @@
+"""Recording what a `Cusser` draws, and replaying it."""
+
+
+from __future__ import annotations
+
+import curses
+import os
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, Iterator, Text, Union
+
+from . import Cusser
+
+# A recording starts with a magic string and the size of the window. Then every
+# frame is a record: its time since the start (in microseconds) and the length of
+# the text written during the frame, followed by that text in UTF-8.
+HEADER = struct.Struct("<8sHH")
+MAGIC = b"cusser\x00\x02"
+RECORD = struct.Struct("<QI")
+
+# Window calls that are recorded as the escape codes with the same effect.
+CLEAR_SCREEN = "\033[2J"
+
+
+def _move(y: int, x: int) -> Text:
+    """Return the escape code `Cusser` reads as a move to a position."""
+    return f"\033[{x + 1};{y + 1}H"
+
+
+@dataclass
+class Recorder:
+    """
+    A `Cusser` wrapper that records what is drawn, one frame per refresh.
+
+    Each frame only holds what was written since the previous one (text with
+    escape codes, along with cursor moves and erasures as escape codes), not the
+    whole screen. Frames are appended to `file` as soon as they end, so that a
+    recording survives a crash.
+
+    Anything else is passed through to the `Cusser`, and isn't recorded.
+    """
+
+    cusser: Cusser
+    file: BinaryIO
+    clock: Callable[[], float] = time.perf_counter
+
+    frames: int = field(default=0, init=False)
+
+    _start: float = field(default=0.0, init=False, repr=False)
+    _pending: list[Text] = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Write the header of the recording."""
+        self._start = self.clock()
+        self.file.write(HEADER.pack(MAGIC, *self.cusser.getmaxyx()))
+
+    @classmethod
+    def open(cls, cusser: Cusser, path: Union[Text, os.PathLike]) -> Recorder:
+        """Record to a new file."""
+        return cls(cusser, open(path, "wb"))
+
+    def addstr(self, text: Text) -> None:
+        """Add a string to the window, and record it."""
+        self._pending.append(text)
+        self.cusser.addstr(text)
+
+    def move(self, y: int, x: int) -> None:
+        """Move the cursor, and record it."""
+        self._pending.append(_move(y, x))
+        self.cusser.move(y, x)
+
+    def erase(self) -> None:
+        """Erase the window, and record it."""
+        self._pending.append(CLEAR_SCREEN)
+        self.cusser.erase()
+
+    def clear(self) -> None:
+        """Clear the window, and record it."""
+        self._pending.append(CLEAR_SCREEN)
+        self.cusser.clear()
+
+    def refresh(self, *args: int) -> None:
+        """Record a frame, and refresh the window."""
+        self.frame()
+        self.cusser.refresh(*args)
+
+    def noutrefresh(self, *args: int) -> None:
+        """Record a frame, and mark the window for the next `doupdate`."""
+        self.frame()
+        self.cusser.noutrefresh(*args)
+
+    def frame(self) -> None:
+        """Record the end of a frame, with everything written since the last one."""
+        data = "".join(self._pending).encode()
+        self._pending.clear()
+        elapsed = round((self.clock() - self._start) * 1_000_000)
+        self.file.write(RECORD.pack(elapsed, len(data)))
+        self.file.write(data)
+        self.file.flush()
+        self.frames += 1
+
+    def close(self) -> None:
+        """Record any pending writes, and close the file."""
+        if self._pending:
+            self.frame()
+        self.file.close()
+
+    def __enter__(self) -> Recorder:
+        """Return the recorder."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the recording."""
+        self.close()
+
+    def __getattr__(self, name: Text) -> Any:
+        """Pass anything else through to the `Cusser`."""
+        return getattr(self.cusser, name)
+
+
+def read_header(file: BinaryIO) -> tuple[int, int]:
+    """Return the size of the window of a recording."""
+    magic, lines, cols = HEADER.unpack(file.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("Not a cusser recording")
+    return lines, cols
+
+
+def read_frames(file: BinaryIO) -> Iterator[tuple[float, Text]]:
+    """
+    Return the frames of a recording (after its header): times and text.
+
+    A frame cut short, as by a crash while recording, ends the recording.
+    """
+    while len(header := file.read(RECORD.size)) == RECORD.size:
+        elapsed, length = RECORD.unpack(header)
+        if len(data := file.read(length)) < length:
+            return
+        yield elapsed / 1_000_000, data.decode()
+
+
+@dataclass
+class ReplayReport:
+    """Throughput and frame timings (in seconds) of a replay."""
+
+    frames: int = 0
+    bytes_written: int = 0
+    elapsed: float = 0.0
+    frame_times: list[float] = field(default_factory=list, repr=False)
+
+    def percentile(self, percent: float) -> float:
+        """Return a percentile of the frame times."""
+        if not self.frame_times:
+            return 0.0
+        times = sorted(self.frame_times)
+        return times[min(len(times) - 1, int(len(times) * percent / 100))]
+
+    def summary(self) -> Text:
+        """Return a human readable summary."""
+        elapsed = self.elapsed or float("inf")
+        return (
+            f"{self.frames} frames, {self.bytes_written} bytes in {self.elapsed:.3f} s "
+            f"({self.frames / elapsed:.1f} frames/s, "
+            f"{self.bytes_written / elapsed:.0f} bytes/s)\n"
+            f"frame time: p50 {self.percentile(50) * 1000:.3f} ms, "
+            f"p95 {self.percentile(95) * 1000:.3f} ms, "
+            f"max {self.percentile(100) * 1000:.3f} ms"
+        )
+
+
+def replay(
+    cusser: Cusser,
+    file: BinaryIO,
+    fast: bool = False,
+    doupdate: Callable[[], None] = curses.doupdate,
+) -> ReplayReport:
+    """
+    Draw the frames of a recording, at their original pace unless `fast`.
+
+    Each frame is timed from its first write to its `doupdate`.
+    """
+    read_header(file)
+    report = ReplayReport()
+    start = time.perf_counter()
+    for elapsed, text in read_frames(file):
+        if not fast and (delay := start + elapsed - time.perf_counter()) > 0:
+            time.sleep(delay)
+        frame_start = time.perf_counter()
+        cusser.addstr(text)
+        cusser.noutrefresh()
+        doupdate()
+        report.frame_times.append(time.perf_counter() - frame_start)
+        report.frames += 1
+        report.bytes_written += len(text.encode())
+    report.elapsed = time.perf_counter() - start
+    return report
@@ -0,0 +1,132 @@
+"""A shadow screen that only sends changed cells to curses."""
+
+
+from __future__ import annotations
+
+import curses
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Text
+
+from . import _addstr
+from .headless import HeadlessWindow
+
+
+@dataclass
+class VirtualScreen(HeadlessWindow):
+    """
+    A window stand-in that records the desired frame and writes only its changes.
+
+    Drawing calls (`addstr`, `move`, `erase`...) update an in-memory grid of
+    characters and attribute words instead of the curses window. `commit` (also
+    called by `refresh` and `noutrefresh`) compares the grid with the last
+    committed frame and writes the changed runs of cells to the window. Other
+    calls are forwarded to the window.
+
+    Wrap a window with it before wrapping it with `Cusser`:
+
+        stdscr = Cusser(VirtualScreen(stdscr))
+    """
+
+    lines: int = field(init=False)
+    cols: int = field(init=False)
+
+    window: curses._CursesWindow
+
+    commits: int = field(default=0, init=False)
+    cells_written: int = field(default=0, init=False)
+
+    # The last committed frame (None if unknown).
+    _front: list[tuple[list[Text], array[int]] | None] = field(init=False, repr=False)
+
+    # Unchanged cells shorter than this between two changed runs with the same
+    # attributes are rewritten, which is cheaper than another curses call.
+    GAP = 4
+
+    def __post_init__(self) -> None:
+        """Create the grid from the window size."""
+        self.lines, self.cols = self.window.getmaxyx()
+        super().__post_init__()
+        self._front = [None] * self.lines
+
+    def clear(self) -> None:
+        """Clear the screen and repaint it completely on the next commit."""
+        self.erase()
+        self._front = [None] * self.lines
+        self.window.clearok(True)
+
+    def commit(self) -> None:
+        """Write the cells that changed since the last commit to the window."""
+        for y in sorted(self._dirty):
+            chars, attrs = self._chars[y], self._attrs[y]
+            front = self._front[y]
+            if front is None:
+                self._write_runs(y, 0, self.cols)
+            elif front[0] != chars or front[1] != attrs:
+                self._write_changes(y, front[0], front[1])
+            self._front[y] = (chars[:], attrs[:])
+        self._dirty.clear()
+
+        self.window.move(self._y, self._x)
+        self.commits += 1
+
+    def refresh(self, *args: int) -> None:
+        """Commit the frame and refresh the window (pads take their viewport)."""
+        self.commit()
+        self.window.refresh(*args)
+
+    def noutrefresh(self, *args: int) -> None:
+        """Commit the frame and mark the window for the next `doupdate`."""
+        self.commit()
+        self.window.noutrefresh(*args)
+
+    def getch(self, *args: Any) -> int:
+        """Commit the frame, which curses refreshes, and read a key from the window."""
+        self.commit()
+        return self.window.getch(*args)
+
+    def nodelay(self, flag: bool) -> None:
+        """Make `getch` non-blocking (or blocking again) on the window."""
+        self.window.nodelay(flag)
+
+    def __getattr__(self, name: Text) -> Any:
+        """Forward all other calls to the underlying window."""
+        return getattr(self.window, name)
+
+    def _write_changes(self, y: int, chars: list[Text], attrs: array[int]) -> None:
+        """Write the cells of a row that differ from the committed ones."""
+        back_chars, back_attrs = self._chars[y], self._attrs[y]
+        x = 0
+        while x < self.cols:
+            if back_chars[x] == chars[x] and back_attrs[x] == attrs[x]:
+                x += 1
+                continue
+
+            # Extend the run over cells with the same attributes, as long as the
+            # unchanged stretches in between are short.
+            attr, last, end = back_attrs[x], x, x + 1
+            while (
+                end < self.cols and back_attrs[end] == attr and end - last <= self.GAP
+            ):
+                if back_chars[end] != chars[end] or attrs[end] != attr:
+                    last = end
+                end += 1
+            self._write(y, x, last + 1)
+            x = last + 1
+
+    def _write_runs(self, y: int, start: int, stop: int) -> None:
+        """Write a stretch of a row, one call per run of equal attributes."""
+        attrs = self._attrs[y]
+        x = start
+        while x < stop:
+            end = x + 1
+            while end < stop and attrs[end] == attrs[x]:
+                end += 1
+            self._write(y, x, end)
+            x = end
+
+    def _write(self, y: int, start: int, stop: int) -> None:
+        """Write cells with the same attributes to the window."""
+        text = "".join(self._chars[y][start:stop])
+        _addstr(self.window, y, start, text, self._attrs[y][start])
+        self.cells_written += stop - start
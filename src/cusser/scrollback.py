@@ -0,0 +1,110 @@
+"""A scrollable history of styled lines, drawn on a pad."""
+
+
+from __future__ import annotations
+
+import curses
+from dataclasses import dataclass, field
+from typing import Any, Text
+
+from . import Cusser
+from .document import DEFAULT_STYLE, Document, Line, Style, parse_lines
+
+
+@dataclass
+class Scrollback:
+    """
+    A bounded history of lines with ANSI escape codes, shown through a viewport.
+
+    Lines are parsed once, when added, into runs of equally styled text (as in
+    `document.parse_lines`). When there are more than `capacity` lines, the oldest
+    ones are dropped. Rendering only draws the lines in view on `pad`, a `Cusser`
+    wrapping a pad the size of the viewport, so its cost doesn't depend on the
+    length of the history.
+
+    Escape codes other than attributes and colors (cursor movements and clears)
+    are ignored.
+    """
+
+    pad: Cusser
+    capacity: int = 10000
+
+    # Keep the last lines in view as new lines are added.
+    follow: bool = True
+    # The index of the first line in view.
+    top: int = field(default=0, init=False)
+
+    # A ring of lines: once full, the oldest line is at `_start`.
+    _lines: list[Line] = field(default_factory=list, init=False, repr=False)
+    _start: int = field(default=0, init=False, repr=False)
+    # Styles carry over from line to line, as on a terminal.
+    _style: Style = field(default=DEFAULT_STYLE, init=False, repr=False)
+
+    @classmethod
+    def new(
+        cls, nlines: int, ncols: int, capacity: int = 10000, **kwargs: Any
+    ) -> Scrollback:
+        """Return a scrollback showing `nlines` lines of `ncols` columns."""
+        return cls(Cusser(curses.newpad(nlines, ncols), **kwargs), capacity)
+
+    @property
+    def height(self) -> int:
+        """Return the number of lines in view."""
+        return self.pad.getmaxyx()[0]
+
+    def __len__(self) -> int:
+        """Return the number of lines in the history."""
+        return len(self._lines)
+
+    def append(self, text: Text) -> None:
+        """
+        Add one or more lines of text to the history.
+
+        Lines are split on newlines only, and blank lines are kept. A newline at
+        the end of the text doesn't start another line.
+        """
+        document = parse_lines(text, self._style)
+        self._style = document.style
+
+        lines = self._lines
+        evicted = 0
+        for line in document.lines:
+            if len(lines) < self.capacity:
+                lines.append(line)
+            else:
+                lines[self._start] = line
+                self._start = (self._start + 1) % self.capacity
+                evicted += 1
+
+        if self.follow:
+            self.top = max(0, len(lines) - self.height)
+        else:
+            # Keep the same lines in view, as far as they are still there.
+            self.top = max(0, self.top - evicted)
+
+    def scroll(self, lines: int) -> None:
+        """Scroll down (or up, if negative) by a number of lines."""
+        self.scroll_to(self.top + lines)
+
+    def scroll_to(self, top: int) -> None:
+        """Show the lines starting at an index, following new lines at the end."""
+        bottom = max(0, len(self._lines) - self.height)
+        self.top = min(max(0, top), bottom)
+        self.follow = self.top == bottom
+
+    def render(self) -> None:
+        """Draw the lines in view on the pad."""
+        lines, start = self._lines, self._start
+        view = [
+            lines[(start + y) % len(lines)]
+            for y in range(self.top, min(self.top + self.height, len(lines)))
+        ]
+        self.pad.erase()
+        self.pad.move(0, 0)
+        self.pad.adddocument(Document(view))
+
+    def noutrefresh(self, y: int, x: int) -> None:
+        """Render the view and mark it for the next `doupdate`, at a position."""
+        self.render()
+        height, width = self.pad.getmaxyx()
+        self.pad.noutrefresh(0, 0, y, x, y + height - 1, x + width - 1)
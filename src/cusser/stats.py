@@ -0,0 +1,91 @@
+"""Opt-in render statistics."""
+
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Text
+
+from stransi import SetAttribute, SetClear, SetColor, SetCursor
+
+# Instruction types and the names their statistics are kept under.
+KINDS = {
+    str: "text",
+    SetAttribute: "attribute",
+    SetColor: "color",
+    SetClear: "clear",
+    SetCursor: "cursor",
+}
+
+
+@dataclass
+class RenderStats:
+    """
+    Counters and cumulative timings (in seconds) of what `Cusser` renders.
+
+    Pass an instance to `Cusser` to start collecting. `on_render`, if set, is
+    called with the statistics after every render, e.g. to export them.
+    """
+
+    on_render: Optional[Callable[[RenderStats], None]] = None
+
+    renders: int = field(default=0, init=False)
+    counts: dict[Text, int] = field(init=False)
+    times: dict[Text, float] = field(init=False)
+    curses_calls: int = field(default=0, init=False)
+    bytes_written: int = field(default=0, init=False)
+    colors_added: int = field(default=0, init=False)
+    pairs_added: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        """Start counting from zero."""
+        self.reset()
+
+    def reset(self) -> None:
+        """Set all counters and timings back to zero."""
+        self.renders = 0
+        self.counts = dict.fromkeys(KINDS.values(), 0)
+        self.times = dict.fromkeys(KINDS.values(), 0.0)
+        self.curses_calls = 0
+        self.bytes_written = 0
+        self.colors_added = 0
+        self.pairs_added = 0
+
+    def snapshot(self) -> dict[Text, Any]:
+        """Return the statistics as a flat dictionary."""
+        result: dict[Text, Any] = {
+            "renders": self.renders,
+            "curses_calls": self.curses_calls,
+            "bytes_written": self.bytes_written,
+            "colors_added": self.colors_added,
+            "pairs_added": self.pairs_added,
+        }
+        for kind, count in self.counts.items():
+            result[f"{kind}_count"] = count
+            result[f"{kind}_time"] = self.times[kind]
+        return result
+
+    def record(self, kind: Text, elapsed: float) -> None:
+        """Count an instruction of a kind and the time it took."""
+        self.counts[kind] += 1
+        self.times[kind] += elapsed
+
+
+@dataclass
+class CountingWindow:
+    """A window proxy that counts the calls made to the window."""
+
+    window: Any
+    stats: RenderStats
+
+    def __getattr__(self, name: Text) -> Any:
+        """Return a window method that counts its calls."""
+        attr = getattr(self.window, name)
+        if not callable(attr):
+            return attr
+
+        def counted(*args: Any) -> Any:
+            self.stats.curses_calls += 1
+            return attr(*args)
+
+        return counted
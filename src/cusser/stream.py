@@ -0,0 +1,70 @@
+"""Incremental rendering of ANSI text that arrives in chunks."""
+
+
+from __future__ import annotations
+
+import codecs
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Text, Union
+
+from .tokenizer import tokenize
+
+if TYPE_CHECKING:
+    from . import Cusser
+
+
+@dataclass
+class StreamWriter:
+    """
+    A file-like writer that feeds chunks of ANSI text to a `Cusser`.
+
+    Chunks may be text or bytes and may end anywhere, even in the middle of an
+    escape sequence or of an encoded character: incomplete pieces are held back
+    until the next chunk completes them. Everything else is rendered right away,
+    so memory use does not depend on the length of the stream.
+    """
+
+    cusser: Cusser
+    encoding: Text = "utf-8"
+    errors: Text = "replace"
+
+    _pending: Text = field(default="", init=False, repr=False)
+    _decoder: codecs.IncrementalDecoder = field(init=False, repr=False)
+
+    # An escape sequence that may still be completed by the next chunk.
+    INCOMPLETE_ESCAPE = re.compile(r"\N{ESC}(?:\[[\d;]*)?\Z")
+    # Longer "escape sequences" are surely garbage, so they are let through.
+    MAX_PENDING = 64
+
+    def __post_init__(self) -> None:
+        """Create the incremental decoder."""
+        self._decoder = codecs.getincrementaldecoder(self.encoding)(self.errors)
+
+    def write(self, chunk: Union[Text, bytes]) -> int:
+        """Render a chunk, holding back any incomplete escape sequence."""
+        text = self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        if self._pending:
+            text = self._pending + text
+            self._pending = ""
+
+        match = self.INCOMPLETE_ESCAPE.search(text)
+        if match and len(text) - match.start() <= self.MAX_PENDING:
+            self._pending = text[match.start() :]  # noqa: E203
+            text = text[: match.start()]
+
+        if text:
+            self.cusser._render(tokenize(text))
+        return len(chunk)
+
+    def flush(self) -> None:
+        """Do nothing, as complete input is always rendered right away."""
+
+    def close(self) -> None:
+        """Render any remaining text, dropping an unfinished escape sequence."""
+        text = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        if match := self.INCOMPLETE_ESCAPE.search(text):
+            text = text[: match.start()]
+        if text:
+            self.cusser._render(tokenize(text))
@@ -0,0 +1,144 @@
+"""A render thread that owns all curses calls, for multi-threaded programs."""
+
+
+from __future__ import annotations
+
+import curses
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Optional, Text
+
+if TYPE_CHECKING:
+    from . import Cusser
+    from .compositor import Compositor
+
+# Tells the render thread to stop.
+_STOP = object()
+
+
+@dataclass
+class RenderThread:
+    """
+    Apply writes from any thread on a single thread, in batches, once per frame.
+
+    curses and the color manager are not thread-safe, so they are only used by
+    the render thread. Other threads just queue their writes, which doesn't block
+    on any lock held while rendering. Each frame applies every write queued so
+    far, then calls `noutrefresh` on every window written to (or refreshes the
+    `compositor`, if there is one) and `doupdate` once. Frames are at least
+    `1 / max_fps` seconds apart.
+
+    Use it as a context manager, or call `start` and `stop`.
+    """
+
+    max_fps: float = 60.0
+    doupdate: Callable[[], None] = curses.doupdate
+    compositor: Optional[Compositor] = None
+
+    frames: int = field(default=0, init=False)
+    writes: int = field(default=0, init=False)
+
+    # Queued work: strings to add to windows, functions to call, or `_STOP`.
+    _queue: queue.SimpleQueue[tuple[Cusser, Text] | Callable[[], Any] | object] = field(
+        default_factory=queue.SimpleQueue, init=False, repr=False
+    )
+    _thread: Optional[threading.Thread] = field(default=None, init=False, repr=False)
+    _error: Optional[BaseException] = field(default=None, init=False, repr=False)
+
+    def addstr(self, cusser: Cusser, text: Text) -> None:
+        """Queue a string to be added to a window in the next frame."""
+        self._queue.put((cusser, text))
+
+    def call(self, function: Callable[[], Any]) -> None:
+        """Queue a function to be called on the render thread in the next frame."""
+        self._queue.put(function)
+
+    def start(self) -> None:
+        """Start rendering frames on a new thread."""
+        if self._thread is not None:
+            raise RuntimeError("The renderer is already running")
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run, name="cusser-render", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop rendering frames, applying any pending writes first.
+
+        If rendering failed, the error is raised here.
+        """
+        if self._thread is None:
+            return
+
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        if (error := self._error) is not None:
+            self._error = None
+            raise error
+
+    def __enter__(self) -> RenderThread:
+        """Start the renderer."""
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Stop the renderer."""
+        self.stop()
+
+    def _run(self) -> None:
+        """Render a frame whenever there are writes, but not too often."""
+        interval = 1 / self.max_fps
+        next_frame = time.monotonic()
+        stopping = False
+        try:
+            while not stopping:
+                if (item := self._queue.get()) is _STOP:
+                    break
+                batch = [item]
+                if (delay := next_frame - time.monotonic()) > 0:
+                    time.sleep(delay)
+                batch.extend(self._drain())
+                if stopping := batch[-1] is _STOP:
+                    batch.pop()
+                if batch:
+                    self._frame(batch)
+                    next_frame = time.monotonic() + interval
+        except BaseException as error:
+            self._error = error
+
+    def _drain(self) -> list[Any]:
+        """Return all queued items, up to a request to stop."""
+        items: list[Any] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return items
+            items.append(item)
+            if item is _STOP:
+                return items
+
+    def _frame(self, batch: list[Any]) -> None:
+        """Apply a batch of writes and update the screen once."""
+        touched: dict[int, Cusser] = {}
+        for item in batch:
+            if callable(item):
+                item()
+                continue
+            cusser, text = item
+            cusser.addstr(text)
+            touched[id(cusser)] = cusser
+            self.writes += 1
+
+        if self.compositor is not None:
+            self.compositor.refresh()
+        else:
+            for cusser in touched.values():
+                cusser.noutrefresh()
+            self.doupdate()
+        self.frames += 1
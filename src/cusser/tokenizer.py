@@ -0,0 +1,122 @@
+"""A fast tokenizer for the escape codes cusser handles, with stransi as fallback."""
+
+
+from __future__ import annotations
+
+import re
+from typing import Optional, Text
+
+import ochre
+from stransi import SetAttribute, SetClear, SetColor, SetCursor
+from stransi.attribute import Attribute
+from stransi.clear import Clear
+from stransi.color import ColorRole
+from stransi.cursor import CursorMove
+from stransi.escape import Escape
+from stransi.instruction import Instruction
+
+# The same escape codes `stransi.Ansi` recognizes, split into parameters and command.
+PATTERN = re.compile(r"\N{ESC}\[([\d;]*)([a-zA-Z])")
+
+ATTRIBUTES = {attribute.value: SetAttribute(attribute) for attribute in Attribute}
+CLEARS = {
+    "J": {0: Clear.SCREEN_AFTER, 1: Clear.SCREEN_BEFORE, 2: Clear.SCREEN},
+    "K": {0: Clear.LINE_AFTER, 1: Clear.LINE_BEFORE, 2: Clear.LINE},
+}
+STEPS = {
+    "A": CursorMove.up,
+    "B": CursorMove.down,
+    "C": CursorMove.right,
+    "D": CursorMove.left,
+}
+
+# Decoded escape codes. Their instructions (and colors) are shared.
+_memo: dict[Text, tuple[Instruction, ...]] = {}
+MEMO_SIZE = 4096
+
+
+def tokenize(text: Text) -> list[Instruction | Text]:
+    """
+    Return the instructions and text of a string, like `stransi.Ansi.instructions`.
+
+    Escape codes for attributes, colors, cursor movements and clears are decoded
+    here, in a single pass, and memoized. Others are left to stransi.
+    """
+    if "\N{ESC}" not in text:
+        # Subclasses (such as `Ansi`) are plain text once tokenized.
+        return [str(text)] if text else []
+
+    result: list[Instruction | Text] = []
+    start = 0
+    for match in PATTERN.finditer(text):
+        if match.start() > start:
+            result.append(text[start : match.start()])  # noqa: E203
+        start = match.end()
+
+        escape = match.group()
+        try:
+            result.extend(_memo[escape])
+        except KeyError:
+            if len(_memo) >= MEMO_SIZE:
+                _memo.clear()
+            instructions = _memo[escape] = _decode(*match.groups()) or tuple(
+                Escape(escape).instructions()
+            )
+            result.extend(instructions)
+    if start < len(text):
+        result.append(text[start:])
+    return result
+
+
+def _decode(params: Text, command: Text) -> Optional[tuple[Instruction, ...]]:
+    """Decode the common escape codes, or return None to leave it to stransi."""
+    args = [int(param) if param else 0 for param in params.split(";")]
+    if command == "m":
+        return _decode_sgr(args)
+    if command in STEPS and len(args) == 1:
+        return (SetCursor(STEPS[command](args[0] or 1)),)
+    if command in "Hf" and len(args) <= 2:
+        x, y = args[0] or 1, (args[1] if len(args) > 1 else 0) or 1
+        return (SetCursor(CursorMove.to(x - 1, y - 1)),)
+    if command in CLEARS and len(args) == 1 and args[0] in CLEARS[command]:
+        return (SetClear(CLEARS[command][args[0]]),)
+    return None
+
+
+def _decode_sgr(args: list[int]) -> Optional[tuple[Instruction, ...]]:  # noqa: C901
+    """Decode graphic rendition parameters, or return None if unusual."""
+    instructions: list[Instruction] = []
+    i = 0
+    while i < len(args):
+        code = args[i]
+        if code in ATTRIBUTES:
+            instructions.append(ATTRIBUTES[code])
+            i += 1
+            continue
+
+        role = (
+            ColorRole.BACKGROUND
+            if 40 <= code < 50 or code >= 100
+            else ColorRole.FOREGROUND
+        )
+        color: Optional[ochre.Color]
+        if 30 <= code <= 37 or 40 <= code <= 47:
+            color = ochre.Ansi256(code - role.value)
+        elif 90 <= code <= 97 or 100 <= code <= 107:
+            color = ochre.Ansi256(code - role.value - 52)
+        elif code in (39, 49):
+            color = None
+        elif code in (38, 48) and i + 2 < len(args) and args[i + 1] == 5:
+            if args[i + 2] > 255:
+                return None
+            color = ochre.Ansi256(args[i + 2])
+            i += 2
+        elif code in (38, 48) and i + 4 < len(args) and args[i + 1] == 2:
+            red, green, blue = args[i + 2 : i + 5]  # noqa: E203
+            color = ochre.RGB(red / 255, green / 255, blue / 255)
+            i += 4
+        else:
+            return None
+        instructions.append(SetColor(role=role, color=color))
+        i += 1
+    return tuple(instructions)
@@ -0,0 +1,202 @@
+"""Browsing files of any size with ANSI escape codes, without loading them."""
+
+
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import struct
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Optional, Text, Union
+
+from . import Cusser
+from .document import DEFAULT_STYLE, Style, parse_lines
+
+NEWLINE = re.compile(rb"\n")
+# Escape codes that select graphic renditions (attributes and colors).
+SGR = re.compile(rb"\x1b\[[\d;]*m")
+
+# The header of an index file: a magic string, then the size and modification time
+# of the indexed file, the checkpoint interval, and the number of line offsets.
+INDEX_HEADER = struct.Struct("<8sQQQQ")
+INDEX_MAGIC = b"cusser\x00\x01"
+
+
+@dataclass
+class FileViewer:
+    """
+    A viewport on a file with ANSI escape codes, which is never fully loaded.
+
+    The file is memory-mapped, and indexed once: the offset of every line, and
+    the style (attributes and colors) at the start of every `checkpoint_interval`
+    lines. Rendering only decodes and parses the lines in view, starting from the
+    styles of the closest checkpoint and the escape codes of the lines in between.
+
+    The index can be saved next to the file, to open it again without scanning it.
+    """
+
+    cusser: Cusser
+    path: Union[Text, os.PathLike]
+    checkpoint_interval: int = 1000
+    encoding: Text = "utf-8"
+
+    # The index of the first line in view.
+    top: int = field(default=0, init=False)
+    # The offset of the start of every line, followed by the size of the file.
+    offsets: array[int] = field(default_factory=lambda: array("Q"), init=False)
+    # The style at the start of every `checkpoint_interval` lines.
+    checkpoints: list[Style] = field(default_factory=list, init=False)
+
+    _file: Optional[BinaryIO] = field(default=None, init=False, repr=False)
+    _data: Any = field(default=b"", init=False, repr=False)
+
+    @classmethod
+    def open(
+        cls,
+        cusser: Cusser,
+        path: Union[Text, os.PathLike],
+        index_path: Optional[Union[Text, os.PathLike]] = None,
+        **kwargs: Any,
+    ) -> FileViewer:
+        """
+        Open a file, and index it.
+
+        If `index_path` is given, the index is loaded from there if it matches the
+        file, and saved there otherwise.
+        """
+        viewer = cls(cusser, path, **kwargs)
+        viewer._file = open(path, "rb")
+        if os.fstat(viewer._file.fileno()).st_size:
+            viewer._data = mmap.mmap(viewer._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if index_path is None or not viewer.load_index(index_path):
+            viewer.build_index()
+            if index_path is not None:
+                viewer.save_index(index_path)
+        return viewer
+
+    def close(self) -> None:
+        """Unmap and close the file."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = b""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> FileViewer:
+        """Return the viewer."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the file."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Return the number of lines in the file."""
+        return max(0, len(self.offsets) - 1)
+
+    @property
+    def height(self) -> int:
+        """Return the number of lines in view."""
+        return self.cusser.getmaxyx()[0]
+
+    def build_index(self) -> None:
+        """Scan the file for line offsets and checkpoint styles."""
+        data, size = self._data, len(self._data)
+        offsets = array("Q", [0])
+        offsets.extend(match.end() for match in NEWLINE.finditer(data))
+        if offsets[-1] != size:
+            offsets.append(size)
+
+        checkpoints, style = [], DEFAULT_STYLE
+        interval = self.checkpoint_interval
+        for line in range(0, max(1, len(offsets) - 1), interval):
+            checkpoints.append(style)
+            end = offsets[min(line + interval, len(offsets) - 1)]
+            style = self._styles(offsets[line], end, style)
+        self.offsets, self.checkpoints = offsets, checkpoints
+
+    def save_index(self, path: Union[Text, os.PathLike]) -> None:
+        """Save the index to a file."""
+        styles = array("q", [value for style in self.checkpoints for value in style])
+        with open(path, "wb") as file:
+            file.write(
+                INDEX_HEADER.pack(
+                    INDEX_MAGIC,
+                    *self._stamp(),
+                    self.checkpoint_interval,
+                    len(self.offsets),
+                )
+            )
+            self.offsets.tofile(file)
+            styles.tofile(file)
+
+    def load_index(self, path: Union[Text, os.PathLike]) -> bool:
+        """
+        Load the index from a file, and return whether it was loaded.
+
+        Indexes of another version of the file (or a missing one) are not loaded.
+        """
+        try:
+            with open(path, "rb") as file:
+                header = file.read(INDEX_HEADER.size)
+                magic, size, mtime, interval, count = INDEX_HEADER.unpack(header)
+                if magic != INDEX_MAGIC or (size, mtime) != self._stamp():
+                    return False
+                offsets, styles = array("Q"), array("q")
+                offsets.fromfile(file, count)
+                styles.fromfile(file, 3 * -(-max(1, count - 1) // interval))
+        except (OSError, EOFError, struct.error):
+            return False
+
+        self.checkpoint_interval, self.offsets = interval, offsets
+        self.checkpoints = [
+            (styles[i], styles[i + 1], styles[i + 2]) for i in range(0, len(styles), 3)
+        ]
+        return True
+
+    def line(self, index: int) -> Text:
+        """Return a line, with its escape codes."""
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self._decode(start, end).rstrip("\r\n")
+
+    def scroll(self, lines: int) -> None:
+        """Scroll down (or up, if negative) by a number of lines."""
+        self.scroll_to(self.top + lines)
+
+    def scroll_to(self, top: int) -> None:
+        """Show the lines starting at an index."""
+        self.top = min(max(0, top), max(0, len(self) - self.height))
+
+    def render(self) -> None:
+        """Draw the lines in view."""
+        checkpoint = self.top // self.checkpoint_interval
+        start = checkpoint * self.checkpoint_interval
+        offsets = self.offsets
+        style = self.checkpoints[checkpoint] if self.checkpoints else DEFAULT_STYLE
+        style = self._styles(offsets[start], offsets[self.top], style)
+
+        bottom = min(self.top + self.height, len(self))
+        text = self._decode(offsets[self.top], offsets[bottom])
+        self.cusser.erase()
+        self.cusser.move(0, 0)
+        self.cusser.adddocument(parse_lines(text, style))
+
+    def _styles(self, start: int, end: int, style: Style) -> Style:
+        """Return a style, after the escape codes of a part of the file."""
+        codes = SGR.findall(self._data, start, end)
+        if not codes:
+            return style
+        return parse_lines(b"".join(codes).decode("ascii"), style).style
+
+    def _decode(self, start: int, end: int) -> Text:
+        """Return a part of the file as text."""
+        return self._data[start:end].decode(self.encoding, errors="replace")
+
+    def _stamp(self) -> tuple[int, int]:
+        """Return the size and modification time of the file."""
+        assert self._file is not None
+        stat = os.fstat(self._file.fileno())
+        return stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,96 @@
+"""Tests for the asyncio front-end."""
+
+import asyncio
+
+import pytest
+
+from cusser.aio import AsyncRenderer
+
+
+class Window:
+    """A fake Cusser that counts what is done to it."""
+
+    def __init__(self):
+        self.text = ""
+        self.refreshes = 0
+
+    def addstr(self, text):
+        if text == "boom":
+            raise ValueError(text)
+        self.text += text
+
+    def noutrefresh(self):
+        self.refreshes += 1
+
+
+def test_batched_frames():
+    """Ensure bursts of writes are applied in a few frames."""
+    updates = 0
+
+    def doupdate():
+        nonlocal updates
+        updates += 1
+
+    left, right = Window(), Window()
+
+    async def producer(window: Window, renderer: AsyncRenderer) -> None:
+        for i in range(100):
+            renderer.addstr(window, f"{i % 10}")
+            if i % 10 == 0:
+                await asyncio.sleep(0)
+
+    async def main() -> AsyncRenderer:
+        async with AsyncRenderer(max_fps=20, doupdate=doupdate) as renderer:
+            await asyncio.gather(producer(left, renderer), producer(right, renderer))
+            await asyncio.sleep(0.01)
+        return renderer
+
+    renderer = asyncio.run(main())
+
+    assert left.text == right.text == "0123456789" * 10
+    assert renderer.writes == 200
+    assert renderer.frames == updates <= 3
+    assert left.refreshes == right.refreshes == renderer.frames
+
+
+def test_failed_frame():
+    """Ensure rendering errors are raised by `stop`, and the renderer restarts."""
+    window = Window()
+
+    async def main() -> AsyncRenderer:
+        renderer = AsyncRenderer(doupdate=lambda: None)
+        await renderer.start()
+        renderer.addstr(window, "boom")
+        await asyncio.sleep(0.01)
+        renderer.addstr(window, "lost")
+        with pytest.raises(ValueError):
+            await renderer.stop()
+
+        async with renderer:
+            renderer.addstr(window, "ok")
+        return renderer
+
+    renderer = asyncio.run(main())
+    assert window.text == "ok"
+    assert renderer.frames == 1
+
+
+def test_compositor():
+    """Ensure the compositor is refreshed instead of the windows."""
+
+    class Compositor:
+        refreshes = 0
+
+        def refresh(self):
+            self.refreshes += 1
+
+    window, compositor = Window(), Compositor()
+
+    async def main() -> None:
+        async with AsyncRenderer(compositor=compositor) as renderer:
+            renderer.addstr(window, "hello")
+
+    asyncio.run(main())
+    assert window.text == "hello"
+    assert compositor.refreshes == 1
+    assert window.refreshes == 0
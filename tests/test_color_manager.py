@@ -5,7 +5,7 @@ from typing import Optional
 import ochre
 import pytest
 
-from cusser.color_manager import ColorManager
+from cusser.color_manager import ColorManager, color_key
 
 
 @pytest.fixture
@@ -164,3 +164,157 @@ def test_managing_current_pair(color_manager: ColorManager):
     assert color_manager.foreground is None
     assert color_manager.background is None
     assert None in color_manager
+
+
+def test_pair_index(color_manager: ColorManager):
+    """Test looking up pair indices by their colors."""
+    n = color_manager.next_pair_index
+
+    i = color_manager.pair_index(ochre.Ansi256(1), None)
+    assert i == n
+    assert color_manager.pair_index(ochre.Ansi256(1), None) == n
+    assert color_manager.pair_index(ochre.Hex("#800000"), None) == n
+    assert color_manager[ochre.ColorPair(ochre.Ansi256(1), None)] == n
+    assert color_manager.next_pair_index == n + 1
+
+    color_manager.discard(ochre.ColorPair(ochre.Ansi256(1), None))
+    assert color_manager.pair_index(ochre.Ansi256(1), None) == n + 1
+
+
+def test_interned_current_pair(color_manager: ColorManager):
+    """Test that setting the same colors again reuses the same pair."""
+    color_manager.foreground = ochre.Ansi256(2)
+    color_manager.background = ochre.Ansi256(4)
+    pair = color_manager.current_pair
+
+    color_manager.foreground = None
+    color_manager.foreground = ochre.Ansi256(2)
+    assert color_manager.current_pair is pair
+
+
+def test_bounded_allocation():
+    """Test that indices are recycled and old pairs evicted when full."""
+    initialized = []
+    color_manager = ColorManager(
+        max_colors=4,
+        max_pairs=3,
+        on_add_pair=lambda pair, manager: initialized.append(manager[pair]),
+    )
+    color_manager.add(ochre.ColorPair(), allow_zero=True)
+
+    for code in range(10):
+        color_manager.pair_index(ochre.Ansi256(code), ochre.Ansi256(0))
+        assert set(color_manager.color_indices.values()) <= {-1, 0, 1, 2, 3}
+        assert set(color_manager.pair_indices.values()) <= {0, 1, 2}
+
+    assert initialized == [0, 1, 2, 1, 2, 1, 2, 1, 2, 1, 2]
+    assert color_manager.evicted_pairs == 8
+    assert color_manager.evicted_colors == 6
+    assert ochre.ColorPair() in color_manager
+
+    # Using a pair makes it the most recently used one.
+    old = color_manager.pair_index(ochre.Ansi256(8), ochre.Ansi256(0))
+    color_manager.pair_index(ochre.Ansi256(5), ochre.Ansi256(0))
+    assert color_manager.pair_index(ochre.Ansi256(8), ochre.Ansi256(0)) == old
+
+
+def test_discarded_indices_are_recycled():
+    """Test that discarded indices are reused once the manager is full."""
+    color_manager = ColorManager(max_colors=2)
+    color_manager.add(ochre.Ansi256(1))
+    color_manager.add(ochre.Ansi256(2))
+    color_manager.discard(ochre.Ansi256(1))
+    color_manager.add(ochre.Ansi256(3))
+    assert color_manager[ochre.Ansi256(3)] == 0
+    assert color_manager.evicted_colors == 0
+
+
+def test_discarded_colors_take_their_pairs():
+    """Test that pairs using a discarded color don't keep its recycled index."""
+    defined = {}
+    color_manager = ColorManager(
+        max_colors=17,
+        indexed_colors=16,
+        on_add_color=lambda color, manager: defined.update({manager[color]: color}),
+    )
+    color_manager.add(ochre.ColorPair(), allow_zero=True)
+    red, blue = ochre.Hex("#ff0000"), ochre.Hex("#0000ff")
+
+    color_manager.pair_index(red, None)
+    color_manager.discard(red)
+    assert ochre.ColorPair(red, None) not in color_manager.pairs
+
+    index = color_manager.pair_index(blue, None)
+    assert defined[color_manager[blue]] == blue
+    assert color_manager.pair_index(blue, None) == index
+
+    # Red takes the index back from blue, whose pair goes along with it.
+    color_manager.pair_index(red, None)
+    assert defined[color_manager[red]] == red
+    assert ochre.ColorPair(blue, None) not in color_manager.pairs
+    assert color_manager.evicted_pairs == 1
+
+
+def test_indexed_colors():
+    """Test that indexed colors use the terminal colors without defining them."""
+    defined = []
+    color_manager = ColorManager(
+        indexed_colors=16, on_add_color=lambda color, _: defined.append(color)
+    )
+    color_manager.add(ochre.ColorPair(), allow_zero=True)
+
+    color_manager.pair_index(ochre.Ansi256(9), ochre.RGB(0, 0.5, 1))
+    color_manager.pair_index(ochre.Ansi256(200), ochre.Hex("#007fff"))
+    assert color_manager[ochre.Ansi256(9)] == 9
+    assert color_manager[ochre.RGB(0, 0.5, 1)] == 16
+    assert color_manager[ochre.Ansi256(200)] == 17
+    assert defined == [ochre.RGB(0, 0.5, 1), ochre.Ansi256(200)]
+
+
+def test_color_keys():
+    """Test that color keys agree with the colors' own integer values."""
+    for color in [ochre.RGB(0.1, 0.33, 0.5), ochre.Hex("#c0ffee"), ochre.Hex(0xBEEF)]:
+        assert color_key(color) == int(color)
+
+
+def test_preload():
+    """Test that themes are registered up front, and pinned ones kept."""
+    color_manager = ColorManager(max_colors=8, max_pairs=6)
+    color_manager.add(ochre.ColorPair(), allow_zero=True)
+    theme = [ochre.Hex("#102030"), ochre.Hex("#405060")]
+    color_manager.preload(theme, pin=True)
+    assert color_manager.added_pairs == 5
+    indices = {pair: color_manager[pair] for pair in color_manager.pairs}
+
+    for code in range(20):
+        color_manager.pair_index(ochre.Ansi256(code), None)
+    assert color_manager.evicted_pairs > 0
+    assert {pair: color_manager[pair] for pair in indices} == indices
+
+    color_manager.unpin()
+    for code in range(20):
+        color_manager.pair_index(ochre.Ansi256(code), None)
+    assert ochre.ColorPair(*theme) not in color_manager.pair_indices
+
+
+def test_exported_indices():
+    """Test that indices are restored from an export."""
+    defined = []
+    color_manager = ColorManager(indexed_colors=16)
+    color_manager.add(ochre.ColorPair(), allow_zero=True)
+    color_manager.pair_index(ochre.Ansi256(1), ochre.Hex("#123456"))
+    color_manager.preload(
+        [ochre.RGB(1, 0, 0)], [ochre.ColorPair(None, ochre.RGB(1, 0, 0))], pin=True
+    )
+    exported = color_manager.export_indices()
+
+    restored = ColorManager(
+        indexed_colors=16,
+        on_add_color=lambda color, _: defined.append(color_key(color)),
+    )
+    restored.import_indices(exported)
+    assert restored.export_indices() == exported
+    assert defined == [0x123456, 0xFF0000]
+    assert restored.pair_index(ochre.Ansi256(1), ochre.Hex("#123456")) == 1
+    assert restored.pair_index(None, ochre.RGB(1, 0, 0)) == 2
+    assert restored.pair_index(None, None) == 0
@@ -0,0 +1,58 @@
+"""Tests for rendering several windows at once."""
+
+import curses
+
+import pytest
+
+from cusser import Compositor, Cusser
+
+
+class Window:
+    """A fake window that logs its refreshes."""
+
+    def __init__(self, name, log):
+        self.name, self.log = name, log
+
+    def noutrefresh(self, *args):
+        self.log.append((self.name, args))
+
+    def __getattr__(self, name):
+        return lambda *args: None
+
+
+def test_single_update():
+    """Ensure windows are refreshed in order, followed by a single update."""
+    log = []
+    compositor = Compositor(doupdate=lambda: log.append("doupdate"))
+    left = compositor.add(Cusser(Window("left", log)))
+    compositor.add(Cusser(Window("right", log)))
+    pad = compositor.add(Cusser(Window("pad", log)), 0, 0, 1, 1, 5, 5)
+
+    compositor.refresh()
+    assert log == [("left", ()), ("right", ()), ("pad", (0, 0, 1, 1, 5, 5)), "doupdate"]
+
+    log.clear()
+    compositor.scroll(pad, 3, 0, 1, 1, 5, 5)
+    compositor.remove(left)
+    compositor.refresh()
+    assert log == [("right", ()), ("pad", (3, 0, 1, 1, 5, 5)), "doupdate"]
+    assert compositor.frames == 2
+
+    with pytest.raises(ValueError):
+        compositor.add(pad)
+
+
+def test_separate_pens():
+    """Ensure windows keep their own attributes while sharing colors."""
+    stdscr = Cusser(curses.initscr())
+    compositor = Compositor(doupdate=lambda: None)
+    top = compositor.subwindow(stdscr, 1, 10, 0, 0)
+    bottom = compositor.pad(1, 10, (0, 0, 1, 0, 1, 9))
+
+    top.addstr("\033[1;31mtop")
+    bottom.addstr("bottom")
+    compositor.refresh()
+
+    assert top.color_manager is bottom.color_manager is stdscr.color_manager
+    assert top.inch(0, 0) & curses.A_BOLD
+    assert not bottom.inch(0, 0) & curses.A_BOLD
@@ -1,12 +1,28 @@
 """General tests."""
 
 import curses
+import subprocess
+import sys
 from functools import reduce
 
-from cusser import __version__
+import ochre
+
+from cusser import Cusser, __version__
 from cusser._misc import _SUPPORTED_ATTRIBUTE_TAGS, _SUPPORTED_COLOR_TAGS, _app
 
 
+class CallRecorder:
+    """Record the names of the calls made to a window."""
+
+    def __init__(self, window):
+        self.window = window
+        self.calls = []
+
+    def __getattr__(self, name):
+        self.calls.append(name)
+        return getattr(self.window, name)
+
+
 def test_version():
     """Ensure the version is correct."""
     assert __version__ == "0.2.0"
@@ -28,3 +44,107 @@ def test_colors():
         lambda acc, color: acc + color(message) + "\n", _SUPPORTED_COLOR_TAGS, ""
     )
     _app(curses.initscr(), text)
+
+
+def test_instruction_cache():
+    """Ensure repeated strings are parsed only once."""
+    stdscr = Cusser(curses.initscr(), cache_size=2)
+    stdscr.clear_cache()
+
+    stdscr.addstr("\033[1mfoo\033[m")
+    stdscr.addstr("\033[1mfoo\033[m")
+    assert (stdscr.cache_hits, stdscr.cache_misses) == (1, 1)
+
+    stdscr.addstr("bar")
+    stdscr.addstr("baz")
+    stdscr.addstr("\033[1mfoo\033[m")
+    assert (stdscr.cache_hits, stdscr.cache_misses) == (1, 4)
+    assert list(stdscr._cache) == ["baz", "\033[1mfoo\033[m"]
+
+
+def test_coalesced_attributes():
+    """Ensure attribute and color changes cost one attrset per text run (or end)."""
+    window = CallRecorder(curses.initscr())
+    stdscr = Cusser(window)
+    stdscr.addstr("\033[1;4;91;44mfoo\033[1;91mbar\033[22;1mbaz\033[m\033[2m")
+
+    assert window.calls == ["attrset", "addstr", "addstr", "addstr", "attrset"]
+
+
+def test_trailing_attributes():
+    """Ensure attributes set at the end of a string still reach the window."""
+    stdscr = Cusser.headless()
+    stdscr.addstr("foo\033[1m")
+    stdscr.window.addstr("bar")
+    assert stdscr.inch(0, 3) & curses.A_BOLD
+
+    stdscr.addstr("\033[m")
+    stdscr.window.addstr("baz")
+    assert not stdscr.inch(0, 6) & curses.A_BOLD
+
+
+def test_lazy_import():
+    """Ensure importing the package doesn't import the parsing dependencies."""
+    code = (
+        "import sys, cusser;"
+        "print(sorted({'ochre', 'stransi'} & set(sys.modules)));"
+        "cusser.Pen;"
+        "print(sorted({'ochre', 'stransi'} & set(sys.modules)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    assert result.stdout.split("\n")[:2] == ["[]", "['ochre', 'stransi']"]
+
+
+def test_deferred_colors():
+    """Ensure colors are only set up right before the first write."""
+    stdscr = Cusser.headless()
+    assert not stdscr.color_manager.pair_indices
+
+    stdscr.addstr("foo")
+    assert stdscr.color_manager.pair_indices
+
+
+def test_document():
+    """Ensure documents are clipped to the window, keeping styles across lines."""
+    stdscr = Cusser.headless(3, 6)
+    text = "\033[1mskipped\033[31m\nfirst line\nsecond\r\n\033[mthird\nfourth"
+
+    assert stdscr.adddocument(text, skip=1) == 3
+    assert stdscr.window.text() == "first\nsecond\nthird"
+    assert stdscr.inch(0, 0) & curses.A_BOLD
+    assert stdscr.inch(0, 0) == stdscr.inch(1, 5) & ~0xFF | ord("f")
+    assert not stdscr.inch(2, 0) & curses.A_BOLD
+
+
+def test_collapsed_moves():
+    """Ensure consecutive cursor movements cost at most one move."""
+    stdscr = Cusser.headless(5, 10)
+    stdscr.window = window = CallRecorder(stdscr.window)
+    calls = window.calls
+    stdscr.addstr("")
+    calls.clear()
+
+    stdscr.addstr("\033[3;3H\033[1A\033[2C\033[1Bx")
+    assert calls == ["move", "addstr"]
+    assert stdscr.getyx() == (2, 5)
+
+    calls.clear()
+    stdscr.addstr("\033[2C\033[2D\033[1C\033[1D\033[Ky")
+    assert calls == ["getyx", "clrtoeol", "addstr"]
+
+    calls.clear()
+    program = stdscr.compile("\033[1A\033[1B\033[3;3H\033[1A")
+    stdscr.run(program)
+    assert calls == ["move", "attrset"]
+
+
+def test_preload():
+    """Ensure preloaded themes are not registered again while rendering."""
+    stdscr = Cusser.headless()
+    stdscr.preload([None, ochre.Ansi256(1), ochre.Ansi256(200)])
+    added = stdscr.color_manager.added_pairs
+
+    stdscr.addstr("\033[31m\033[48;5;200mtheme\033[39mtheme")
+    assert stdscr.color_manager.added_pairs == added
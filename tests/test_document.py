@@ -0,0 +1,60 @@
+"""Tests for parsing documents ahead of time."""
+
+import curses
+from concurrent.futures import ProcessPoolExecutor
+
+import ochre
+
+from cusser import Cusser
+from cusser.color_manager import color_key
+from cusser.document import DEFAULT_STYLE, parse_document
+
+RED = color_key(ochre.Ansi256(1))
+
+TEXT = (
+    "\033[1mbold\033[31m red\n"
+    "still bold and red\r\n"
+    "\033[22mred \033[44mon blue\n"
+    "\n"
+    "\033[mplain \033[4munderlined\n"
+    "\033[24mlast"
+)
+
+
+def test_parse():
+    """Ensure documents are split into lines of equally styled runs."""
+    document = parse_document(TEXT, workers=1)
+    assert len(document) == 6
+    assert document.lines[0] == (
+        (curses.A_BOLD, -1, -1, "bold"),
+        (curses.A_BOLD, RED, -1, " red"),
+    )
+    assert document.lines[1] == ((curses.A_BOLD, RED, -1, "still bold and red"),)
+    assert document.lines[3] == ()
+    assert document.lines[5] == ((0, -1, -1, "last"),)
+    assert document.style == DEFAULT_STYLE
+
+
+def test_chunks():
+    """Ensure styles carry over from chunk to chunk."""
+    expected = parse_document(TEXT, workers=1)
+    for chunk_size in range(len(TEXT)):
+        assert parse_document(TEXT, workers=1, chunk_size=chunk_size) == expected
+
+    text = TEXT + "\033[1;7;32;41m\n" + TEXT.replace("\033[m", "\033[39m")
+    expected = parse_document(text, workers=1)
+    assert expected.style == (curses.A_REVERSE, -1, color_key(ochre.Ansi256(4)))
+    with ProcessPoolExecutor(2) as executor:
+        assert parse_document(text, chunk_size=8, executor=executor) == expected
+
+
+def test_render():
+    """Ensure parsed documents are drawn like unparsed ones."""
+    parsed, unparsed = Cusser.headless(4, 8), Cusser.headless(4, 8)
+    assert parsed.adddocument(parse_document(TEXT), skip=1) == 4
+    assert unparsed.adddocument(TEXT, skip=1) == 4
+    assert parsed.window.text() == unparsed.window.text()
+    for y in range(4):
+        for x in range(8):
+            assert parsed.inch(y, x) == unparsed.inch(y, x)
+    assert parsed.getyx() == unparsed.getyx()
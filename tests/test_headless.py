@@ -0,0 +1,42 @@
+"""Tests for the headless window."""
+
+import curses
+import subprocess
+import sys
+
+from cusser import Cusser
+from cusser.pen import color_pair
+
+
+def test_rendering():
+    """Ensure text, attributes and colors end up in the grid."""
+    stdscr = Cusser.headless(3, 10)
+    stdscr.addstr("\033[1mab\033[;38;2;255;0;0mcd\033[m\033[4;2Hef\033[1;3HX\033[K")
+
+    assert stdscr.window.text() == "abcd\n   ef\nX"
+    assert stdscr.window.inch(0, 0) & ~curses.A_COLOR == ord("a") | curses.A_BOLD
+    assert not stdscr.window.inch(0, 2) & curses.A_BOLD
+    assert stdscr.getyx() == (2, 1)
+
+    pair = stdscr.window.inch(0, 2) & curses.A_COLOR
+    index = next(i for i in stdscr.window.pairs if color_pair(i) == pair)
+    assert stdscr.window.colors[stdscr.window.pairs[index][0]] == (1000, 0, 0)
+
+
+def test_without_terminal():
+    """Ensure rendering works without a terminal at all."""
+    code = (
+        "from cusser import Cusser;"
+        "stdscr = Cusser.headless();"
+        "stdscr.addstr('\\033[2J\\033[1;31mhello\\033[m');"
+        "print(stdscr.window.text())"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        env={},
+        stdin=subprocess.DEVNULL,
+        text=True,
+    )
+    assert result.stdout.strip() == "hello"
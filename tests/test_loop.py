@@ -0,0 +1,187 @@
+"""Tests for the event loop."""
+
+import curses
+import os
+import selectors
+import signal
+
+import pytest
+
+from cusser import Cusser
+from cusser import loop as loop_module
+from cusser.loop import EventLoop
+
+
+@pytest.fixture
+def keyboard():
+    """Return a window reading keys from a pipe, and the end to type them into."""
+    read, write = os.pipe()
+    os.set_blocking(read, False)
+    stdscr = Cusser.headless(5, 20)
+
+    def getch():
+        try:
+            return os.read(read, 1)[0]
+        except (BlockingIOError, IndexError):
+            return -1
+
+    stdscr.window.getch = getch
+    yield stdscr, read, write
+    os.close(read)
+    os.close(write)
+
+
+def test_keys(keyboard):
+    """Ensure keys are dispatched, and batches of them drawn once."""
+    stdscr, read, write = keyboard
+    typed = []
+
+    def on_key(key):
+        typed.append(chr(key))
+        loop.invalidate()
+
+    def draw():
+        stdscr.addstr("".join(typed))
+        if typed == ["a", "b", "c"]:
+            os.write(write, b"dq")
+
+    loop = EventLoop(stdscr, doupdate=lambda: None, draw=draw, input=read)
+    loop.on_key = on_key
+    loop.bind("q", lambda key: loop.stop())
+    loop.call_later(0, lambda: os.write(write, b"abc"))
+    loop.run()
+
+    assert typed == ["a", "b", "c", "d"]
+    assert loop.keys == 5
+    assert loop.frames == 3
+    assert stdscr.window.text().split("\n")[0] == "abcabcd"
+
+
+class VirtualTime:
+    """A clock that only moves forward while the loop waits for events."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def selector(self):
+        """Return a selector that never has events, but lets the time pass."""
+        clock = self
+
+        class Selector:
+            def register(self, *args):
+                pass
+
+            def select(self, timeout):
+                clock.now += timeout
+                return []
+
+            def close(self):
+                pass
+
+        return Selector()
+
+
+def test_timers(keyboard, monkeypatch: pytest.MonkeyPatch):
+    """Ensure timers are called in order, repeatedly if asked to."""
+    stdscr, read, _ = keyboard
+    clock = VirtualTime()
+    monkeypatch.setattr(selectors, "DefaultSelector", clock.selector)
+    calls = []
+    loop = EventLoop(stdscr, doupdate=lambda: None, input=read, clock=clock)
+    ticks = loop.call_every(0.02, lambda: calls.append("tick"))
+    loop.call_later(0.05, lambda: calls.append("later"))
+    loop.call_later(0.09, ticks.cancel)
+    never = loop.call_later(0.03, lambda: calls.append("never"))
+    loop.call_later(0.01, never.cancel)
+    loop.call_later(0.12, loop.stop)
+    loop.run()
+
+    assert calls == ["tick", "tick", "later", "tick", "tick"]
+    assert loop.frames == 1
+    assert clock.now == pytest.approx(0.12)
+
+
+def test_resize(keyboard, monkeypatch: pytest.MonkeyPatch):
+    """Ensure resizes (and only them) wake the loop up, and redraw the screen."""
+    stdscr, read, _ = keyboard
+    monkeypatch.setattr(loop_module, "_curses_initialized", lambda: False)
+    events = []
+
+    def on_resize(*size):
+        events.append(size)
+        loop.stop()
+
+    def resize():
+        events.append("SIGWINCH")
+        os.kill(os.getpid(), signal.SIGWINCH)
+
+    def other_signal():
+        os.kill(os.getpid(), signal.SIGUSR1)
+        loop.call_later(0.001, resize)
+
+    loop = EventLoop(stdscr, doupdate=lambda: None, input=read, on_resize=on_resize)
+    loop.call_later(0, other_signal)
+    previous = signal.getsignal(signal.SIGWINCH)
+    previous_usr1 = signal.signal(signal.SIGUSR1, lambda *_: None)
+    try:
+        loop.run()
+    finally:
+        signal.signal(signal.SIGUSR1, previous_usr1)
+
+    assert events == ["SIGWINCH", (5, 20)]
+    assert loop.frames == 2
+    assert signal.getsignal(signal.SIGWINCH) == previous
+
+
+def test_curses_resizes(keyboard, monkeypatch: pytest.MonkeyPatch):
+    """Ensure the SIGWINCH handler of curses is left alone, and its keys checked."""
+    stdscr, read, _ = keyboard
+    monkeypatch.setattr(loop_module, "_curses_initialized", lambda: True)
+    keys, handlers, sizes = [], [], []
+    stdscr.window.getch = lambda: keys.pop() if keys else -1
+
+    def on_resize(*size):
+        sizes.append(size)
+        loop.stop()
+
+    def resize():
+        handlers.append(signal.getsignal(signal.SIGWINCH))
+        keys.append(curses.KEY_RESIZE)
+
+    loop = EventLoop(
+        stdscr,
+        doupdate=lambda: None,
+        input=read,
+        on_resize=on_resize,
+        resize_interval=0.01,
+    )
+    loop.call_later(0, resize)
+    handler = signal.getsignal(signal.SIGWINCH)
+    loop.run()
+
+    assert handlers == [handler]
+    assert sizes == [(5, 20)]
+
+
+def test_terminal_size(keyboard, monkeypatch: pytest.MonkeyPatch):
+    """Ensure curses is told the new size of a terminal, as lines and columns."""
+    stdscr, read, _ = keyboard
+    monkeypatch.setattr(loop_module, "_curses_initialized", lambda: False)
+    resized = []
+    monkeypatch.setattr(os, "get_terminal_size", lambda fd: os.terminal_size((30, 10)))
+    monkeypatch.setattr(curses, "is_term_resized", lambda lines, cols: True)
+    monkeypatch.setattr(curses, "resizeterm", lambda *size: resized.append(size))
+    sizes = []
+
+    def on_resize(*size):
+        sizes.append(size)
+        loop.stop()
+
+    loop = EventLoop(stdscr, doupdate=lambda: None, input=read, on_resize=on_resize)
+    loop.call_later(0, lambda: os.kill(os.getpid(), signal.SIGWINCH))
+    loop.run()
+
+    assert resized == sizes == [(10, 30)]
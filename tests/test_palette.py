@@ -0,0 +1,77 @@
+"""Tests for fixed terminal palettes."""
+
+import curses
+import random
+
+import ochre
+import pytest
+
+from cusser import Cusser, HeadlessWindow
+from cusser.color_manager import ColorManager
+from cusser.palette import Palette
+
+
+@pytest.fixture
+def palette() -> Palette:
+    """Return the standard xterm palette."""
+    return Palette.xterm()
+
+
+def test_nearest(palette: Palette):
+    """Test finding the closest palette colors."""
+    assert len(palette) == 256
+    assert palette.nearest(ochre.Ansi256(123)) == 123
+    assert palette.nearest(ochre.Hex("#ff0000")) == 9
+    assert palette.nearest(ochre.Hex("#fe0101")) == 9
+    assert palette.nearest(ochre.Hex("#5f87af")) == 67
+    assert palette.nearest(ochre.Hex("#080808")) == 232
+    assert Palette.xterm(8).nearest(ochre.Hex("#ff0000")) == 1
+
+
+def test_nearest_matches_brute_force(palette: Palette):
+    """Test the k-d tree against a linear search."""
+
+    def distance(a: int, b: int) -> int:
+        return sum(((a >> s & 0xFF) - (b >> s & 0xFF)) ** 2 for s in (16, 8, 0))
+
+    rng = random.Random(42)
+    for _ in range(500):
+        value = rng.randrange(1 << 24)
+        expected = min(
+            range(len(palette)), key=lambda i: (distance(value, palette.colors[i]), i)
+        )
+        assert palette.nearest(ochre.Hex(value)) == expected
+
+
+def test_palette_mode(palette: Palette):
+    """Test that colors map to the palette without being defined."""
+    defined = []
+    color_manager = ColorManager(
+        palette=palette, on_add_color=lambda color, _: defined.append(color)
+    )
+    color_manager.add(ochre.ColorPair(), allow_zero=True)
+
+    index = color_manager.pair_index(ochre.Hex("#ff0101"), ochre.Ansi256(4))
+    assert color_manager[ochre.Hex("#ff0101")] == 9
+    assert color_manager[ochre.Ansi256(4)] == 4
+    assert color_manager[ochre.ColorPair(ochre.Hex("#ff0101"), ochre.Ansi256(4))] == (
+        index
+    )
+    assert not defined
+    assert color_manager.next_color_index == 0
+
+
+def test_few_colors(monkeypatch: pytest.MonkeyPatch):
+    """Test that terminals with only indexed colors use the palette."""
+    monkeypatch.setattr(curses, "start_color", lambda: None)
+    monkeypatch.setattr(curses, "use_default_colors", lambda: None)
+    monkeypatch.setattr(curses, "can_change_color", lambda: True)
+    monkeypatch.setattr(curses, "COLORS", 8, raising=False)
+    monkeypatch.setattr(curses, "COLOR_PAIRS", 64, raising=False)
+    color_manager = ColorManager(on_add_pair=lambda *_: None)
+    stdscr = Cusser(HeadlessWindow(1, 10), color_manager=color_manager)
+
+    stdscr.addstr("\x1b[38;2;1;2;3mhi\x1b[38;5;200m!")
+    assert stdscr.window.text() == "hi!"
+    assert len(color_manager.palette) == 8
+    assert color_manager.next_color_index == 0
@@ -0,0 +1,65 @@
+"""Tests for compiled render programs."""
+
+import curses
+
+import pytest
+
+from cusser import Cusser
+from cusser.program import ATTRSET, FORMAT, MOVE, TEXT
+
+
+@pytest.fixture
+def stdscr() -> Cusser:
+    """Return a new Cusser."""
+    return Cusser(curses.initscr())
+
+
+def test_compile(stdscr: Cusser):
+    """Ensure attributes and colors are folded into attribute words."""
+    program = stdscr.compile("\033[1;4;91mfoo\033[1mbar\033[3;3H{x}\033[m")
+
+    assert [op for op, _ in program.ops] == [
+        ATTRSET,
+        TEXT,
+        TEXT,
+        MOVE,
+        FORMAT,
+        ATTRSET,
+    ]
+    word = program.ops[0][1]
+    assert word & curses.A_BOLD
+    assert word & curses.A_UNDERLINE
+    assert word & curses.A_COLOR
+    assert program.ops[-1][1] == curses.color_pair(
+        stdscr.color_manager[program.pen.pair]
+    )
+
+
+def test_run(stdscr: Cusser):
+    """Ensure programs can be replayed with different values."""
+    program = stdscr.compile("\033[2J\033[32mCPU: \033[1m{cpu}%\033[m {{ok}}")
+
+    stdscr.run(program, cpu=42)
+    assert stdscr.instr(0, 0, 13) == b"CPU: 42% {ok}"
+    stdscr.run(program, cpu=7)
+    assert stdscr.instr(0, 0, 12) == b"CPU: 7% {ok}"
+
+    with pytest.raises(KeyError):
+        stdscr.run(program)
+
+
+def test_relink(stdscr: Cusser):
+    """Ensure programs register their color pairs again when they are evicted."""
+    program = stdscr.compile("\033[38;5;123mfoo")
+    pair = program.links[0][1].pair
+
+    stdscr.color_manager.discard(pair)
+    assert pair not in stdscr.color_manager
+    assert program.generation != stdscr.color_manager.generation
+
+    stdscr.run(program)
+    assert pair in stdscr.color_manager
+    assert program.generation == stdscr.color_manager.generation
+    assert program.ops[0][1] & curses.A_COLOR == curses.color_pair(
+        stdscr.color_manager[pair]
+    )
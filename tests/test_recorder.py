@@ -0,0 +1,71 @@
+"""Tests for recording and replaying sessions."""
+
+import io
+import subprocess
+import sys
+
+from cusser import Cusser
+from cusser.recorder import Recorder, read_frames, read_header, replay
+
+
+def record(file):
+    """Record a short session."""
+    times = iter(range(10))
+    recorder = Recorder(Cusser.headless(5, 20), file, clock=lambda: next(times) / 10)
+    recorder.addstr("\033[1mhello\033[m")
+    recorder.move(2, 3)
+    recorder.addstr("\033[31mworld")
+    recorder.refresh()
+    recorder.erase()
+    recorder.move(4, 10)
+    recorder.addstr("again")
+    recorder.noutrefresh()
+    return recorder
+
+
+def test_record():
+    """Ensure frames hold what was written since the previous one."""
+    file = io.BytesIO()
+    recorder = record(file)
+    assert recorder.frames == 2
+    assert recorder.getmaxyx() == (5, 20)
+
+    file.seek(0)
+    assert read_header(file) == (5, 20)
+    assert list(read_frames(file)) == [
+        (0.1, "\033[1mhello\033[m\033[4;3H\033[31mworld"),
+        (0.2, "\033[2J\033[11;5Hagain"),
+    ]
+
+
+def test_replay():
+    """Ensure replays draw what was recorded."""
+    file = io.BytesIO()
+    recorded = record(file).cusser
+
+    file.seek(0)
+    stdscr = Cusser.headless(5, 20)
+    report = replay(stdscr, file, fast=True, doupdate=lambda: None)
+    assert report.frames == 2
+    assert report.bytes_written == 44
+    assert len(report.frame_times) == 2
+    assert stdscr.window.text() == "\n\n\n\n          again"
+    for y in range(5):
+        for x in range(20):
+            assert stdscr.inch(y, x) == recorded.inch(y, x)
+
+    # A frame cut short ends the recording.
+    file = io.BytesIO(file.getvalue()[:-1])
+    stdscr = Cusser.headless(5, 20)
+    assert replay(stdscr, file, fast=True, doupdate=lambda: None).frames == 1
+
+
+def test_replay_command(tmp_path):
+    """Ensure recordings can be replayed from the command line."""
+    path = tmp_path / "session.rec"
+    with path.open("wb") as file:
+        record(file)
+
+    command = [sys.executable, "-m", "cusser", "replay", path, "--fast", "--headless"]
+    result = subprocess.run(command, capture_output=True, check=True, text=True)
+    assert result.stdout.startswith("2 frames, 44 bytes in ")
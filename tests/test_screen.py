@@ -0,0 +1,79 @@
+"""Tests for the virtual screen."""
+
+import curses
+
+import pytest
+
+from cusser import Cusser
+from cusser.screen import VirtualScreen
+
+
+@pytest.fixture
+def screen() -> VirtualScreen:
+    """Return a virtual screen over a small window."""
+    curses.initscr()
+    return VirtualScreen(curses.newwin(5, 20, 0, 0))
+
+
+def test_only_changes_are_written(screen: VirtualScreen):
+    """Ensure unchanged cells are not written again."""
+    stdscr = Cusser(screen)
+    frame = "\033[2J\033[1mCPU\033[m: {}%\nMemory: 12 GB"
+
+    stdscr.addstr(frame.format(42))
+    stdscr.refresh()
+    assert screen.window.instr(0, 0, 8) == b"CPU: 42%"
+    assert screen.window.instr(1, 0, 13) == b"Memory: 12 GB"
+    assert screen.window.inch(0, 0) & curses.A_BOLD
+    written = screen.cells_written
+
+    stdscr.addstr(frame.format(42))
+    stdscr.refresh()
+    assert screen.cells_written == written
+
+    stdscr.addstr(frame.format(43))
+    stdscr.refresh()
+    assert screen.cells_written == written + 1
+    assert screen.window.instr(0, 0, 8) == b"CPU: 43%"
+
+
+def test_cursor_and_clearing(screen: VirtualScreen):
+    """Ensure the grid follows curses semantics."""
+    screen.addstr("x" * 25)
+    assert screen.getyx() == (1, 5)
+
+    screen.addstr(0, 3, "ab\ncd")
+    assert screen.getyx() == (1, 2)
+    assert "".join(screen._chars[0]) == "xxxab" + " " * 15
+    assert "".join(screen._chars[1]) == "cdxxx" + " " * 15
+
+    screen.move(1, 1)
+    screen.clrtobot()
+    assert "".join(screen._chars[1]) == "c" + " " * 19
+
+    screen.move(4, 18)
+    with pytest.raises(curses.error):
+        screen.addstr("abc")
+    assert screen._chars[4][-2:] == ["a", "b"]
+
+    screen.commit()
+    assert screen.window.instr(4, 18, 2) == b"ab"
+
+
+def test_getch_commits(screen: VirtualScreen):
+    """Ensure reading a key shows the frame, as curses refreshes the window."""
+    screen.addstr("hi")
+    screen.nodelay(True)
+    assert screen.getch() == -1
+    assert screen.window.instr(0, 0, 2) == b"hi"
+
+
+def test_pad():
+    """Ensure the viewport of a pad is forwarded when refreshing."""
+    curses.initscr()
+    screen = VirtualScreen(curses.newpad(10, 20))
+    screen.addstr(3, 0, "pad")
+    screen.noutrefresh(3, 0, 0, 0, 1, 19)
+    screen.refresh(3, 0, 0, 0, 1, 19)
+    assert screen.window.instr(3, 0, 3) == b"pad"
+    assert screen.commits == 2
@@ -0,0 +1,54 @@
+"""Tests for the scrollback."""
+
+import curses
+
+from cusser import Cusser
+from cusser.scrollback import Scrollback
+
+
+def test_scrollback():
+    """Ensure only the latest lines are kept, and the view follows them."""
+    scrollback = Scrollback(Cusser.headless(3, 8), capacity=10)
+    scrollback.append("\n".join(f"\033[1mline\033[22m {i}" for i in range(20)))
+    scrollback.render()
+
+    assert len(scrollback) == 10
+    assert scrollback.pad.window.text() == "line 17\nline 18\nline 19"
+    assert scrollback.pad.inch(0, 0) & curses.A_BOLD
+    assert not scrollback.pad.inch(0, 5) & curses.A_BOLD
+
+    scrollback.scroll(-100)
+    scrollback.render()
+    assert scrollback.pad.window.text() == "line 10\nline 11\nline 12"
+
+    # Lines in view stay in view, until they are dropped.
+    scrollback.append("line 20\nline 21")
+    scrollback.render()
+    assert scrollback.pad.window.text() == "line 12\nline 13\nline 14"
+
+    scrollback.scroll(100)
+    assert scrollback.follow
+
+
+def test_styles_carry_over():
+    """Ensure styles apply until reset, across lines, and long lines are clipped."""
+    scrollback = Scrollback(Cusser.headless(2, 4))
+    scrollback.append("\033[31mred\nstill red and long\033[m")
+
+    scrollback.render()
+    assert scrollback.pad.window.text() == "red\nstil"
+    assert scrollback.pad.inch(1, 0) == scrollback.pad.inch(0, 0) & ~0xFF | ord("s")
+    assert len(scrollback._lines[1]) == 1
+
+
+def test_blank_lines():
+    """Ensure blank lines are kept, and lines are only split on newlines."""
+    scrollback = Scrollback(Cusser.headless(5, 8))
+    for text in ("a", "", "b"):
+        scrollback.append(text)
+    assert len(scrollback) == 3
+
+    scrollback.append("c\x0cd\r\n\ne\n")
+    scrollback.render()
+    assert len(scrollback) == 6
+    assert scrollback.pad.window.text().split("\n") == ["", "b", "c\x0cd", "", "e"]
@@ -0,0 +1,44 @@
+"""Tests for render statistics."""
+
+from stransi import Ansi
+
+from cusser import Cusser, HeadlessWindow, RenderStats
+
+
+def test_render_stats():
+    """Ensure instructions, curses calls, bytes and allocations are counted."""
+    renders = []
+    stdscr = Cusser.headless(stats=RenderStats(on_render=renders.append))
+    stdscr.addstr("")  # Set colors and the default attributes up.
+    stdscr.stats.reset()
+    renders.clear()
+    stdscr.addstr("\033[2J\033[1;38;2;255;0;0mcafé\033[m\033[2;1Hok")
+
+    stats = stdscr.stats.snapshot()
+    assert stats["renders"] == 1
+    assert stats["text_count"] == 2
+    assert stats["attribute_count"] == 2
+    assert stats["color_count"] == 1
+    assert stats["clear_count"] == 1
+    assert stats["cursor_count"] == 1
+    assert stats["text_time"] > 0
+    assert stats["bytes_written"] == len("café".encode()) + 2
+    # erase, attrset, addstr, move, attrset, addstr
+    assert stats["curses_calls"] == 6
+    assert stats["colors_added"] == 1
+    assert stats["pairs_added"] == 1  # red on default
+    assert renders == [stdscr.stats]
+    assert isinstance(stdscr.window, HeadlessWindow)
+
+    stdscr.stats.reset()
+    assert set(stdscr.stats.snapshot().values()) == {0}
+
+
+def test_text_subclasses():
+    """Ensure text is counted as such, whatever its type."""
+    stdscr = Cusser.headless(1, 20, stats=RenderStats())
+    stdscr.addstr(Ansi("plain"))
+    stdscr.addstr(Ansi("\033[1mbold"))
+
+    assert stdscr.stats.counts["text"] == 2
+    assert stdscr.window.text() == "plainbold"
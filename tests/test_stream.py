@@ -0,0 +1,63 @@
+"""Tests for streaming chunks of text."""
+
+import curses
+
+import pytest
+
+from cusser import Cusser
+
+
+class CellWindow:
+    """A fake window that remembers the attributes of every character."""
+
+    def __init__(self):
+        self.cells = []
+        self.word = curses.A_NORMAL
+
+    def attrset(self, word):
+        self.word = word
+
+    def addstr(self, text):
+        self.cells.extend((char, self.word) for char in text)
+
+
+TEXT = "café \033[1;38;5;200mbold\033[22m plain\033[m \033[4mdone\033[m"
+
+
+@pytest.fixture
+def expected() -> list:
+    """Return the cells of the text when added at once."""
+    curses.initscr()
+    stdscr = Cusser(CellWindow())
+    stdscr.addstr(TEXT)
+    return stdscr.window.cells
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8])
+def test_chunks(expected: list, size: int):
+    """Ensure splitting text (or bytes) anywhere makes no difference."""
+    data = TEXT.encode()
+    stdscr = Cusser(CellWindow())
+    writer = stdscr.writer()
+    for i in range(0, len(data), size):
+        writer.write(data[i : i + size])  # noqa: E203
+    writer.close()
+
+    assert stdscr.window.cells == expected
+
+
+def test_pending_escape():
+    """Ensure incomplete escape sequences are held back until complete."""
+    curses.initscr()
+    stdscr = Cusser(CellWindow())
+    writer = stdscr.writer()
+
+    writer.write("foo\033[1")
+    assert "".join(char for char, _ in stdscr.window.cells) == "foo"
+    writer.write("mbar")
+    assert stdscr.window.cells[-1] == ("r", stdscr.window.word)
+    assert stdscr.window.word & curses.A_BOLD
+
+    writer.write("\033[")
+    writer.close()
+    assert "".join(char for char, _ in stdscr.window.cells) == "foobar"
@@ -0,0 +1,39 @@
+"""Tests for the render thread."""
+
+import threading
+
+import pytest
+
+from cusser import Cusser
+from cusser.threaded import RenderThread
+
+
+def test_concurrent_writes():
+    """Ensure writes from many threads all end up on their windows."""
+    updates = []
+    windows = [Cusser.headless(10, 40) for _ in range(2)]
+
+    def produce(n):
+        for i in range(50):
+            renderer.addstr(windows[n % 2], f"\033[1;3{n}m{n}")
+
+    with RenderThread(max_fps=1000, doupdate=lambda: updates.append(1)) as renderer:
+        threads = [threading.Thread(target=produce, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert renderer.writes == 200
+    assert len(updates) == renderer.frames <= 200
+    assert sorted(windows[0].window.text().replace("\n", "")) == ["0"] * 50 + ["2"] * 50
+    assert sorted(windows[1].window.text().replace("\n", "")) == ["1"] * 50 + ["3"] * 50
+
+
+def test_errors():
+    """Ensure rendering errors are raised when stopping."""
+    renderer = RenderThread(doupdate=lambda: None)
+    renderer.start()
+    renderer.call(lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        renderer.stop()
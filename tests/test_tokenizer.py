@@ -0,0 +1,45 @@
+"""Tests for the tokenizer."""
+
+import pytest
+from stransi import Ansi
+
+from cusser._misc import _SUPPORTED_ATTRIBUTE_TAGS, _SUPPORTED_COLOR_TAGS
+from cusser.tokenizer import tokenize
+
+TEXTS = [
+    "",
+    "plain text",
+    "\033[m\033[0m\033[;1m\033[1;4;9mbold\033[22;24;29m",
+    "\033[31;42m\033[91;102m\033[39;49m\033[38;5;200;48;5;16mcolors",
+    "\033[38;2;10;20;30;48;2;255;128;0m\033[1;38;2;1;2;3;4m",
+    "\033[A\033[3B\033[0C\033[2D\033[H\033[5;7H\033[;3f\033[2J\033[K\033[1K",
+    # Left to stransi.
+    "\033[38;5m\033[38;9;1m\033[2;3A\033[1;2;3H\033[3J\033[5n\033]0;title\a",
+    "\033[38;2;1;2m\033[48;2m",
+    # Not escape codes at all.
+    "\033 \033[",
+]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_same_as_stransi(text):
+    """Ensure the tokenizer agrees with stransi."""
+    try:
+        expected = list(Ansi(text).instructions())
+    except Exception as error:
+        with pytest.raises(type(error)):
+            tokenize(text)
+    else:
+        assert tokenize(text) == expected
+
+
+def test_tags():
+    """Ensure the tokenizer agrees with stransi on the supported tags."""
+    for tag in _SUPPORTED_ATTRIBUTE_TAGS + _SUPPORTED_COLOR_TAGS:
+        assert tokenize(tag("text")) == list(Ansi(tag("text")).instructions())
+
+
+def test_shared_instructions():
+    """Ensure escape codes are decoded once, and their colors shared."""
+    first, second = tokenize("\033[38;2;1;2;3ma"), tokenize("b\033[38;2;1;2;3m")
+    assert first[0] is second[1]
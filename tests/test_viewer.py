@@ -0,0 +1,68 @@
+"""Tests for the file viewer."""
+
+from cusser import Cusser
+from cusser.viewer import FileViewer
+
+TEXT = "".join(
+    f"\033[{30 + i % 8}m{i:03} \033[1mline\033[22m"
+    + ("\033[4m" if i == 5 else "")
+    + "\r\n"
+    for i in range(12)
+)
+
+
+def screen(stdscr):
+    """Return the text and attributes of a window."""
+    height, width = stdscr.getmaxyx()
+    return [stdscr.inch(y, x) for y in range(height) for x in range(width)]
+
+
+def test_render(tmp_path):
+    """Ensure lines are drawn as if the whole file was rendered."""
+    path = tmp_path / "log.txt"
+    path.write_text(TEXT)
+    expected = Cusser.headless(4, 12)
+    with FileViewer.open(Cusser.headless(4, 12), path, checkpoint_interval=3) as viewer:
+        assert len(viewer) == 12
+        assert viewer.line(11) == "\033[33m011 \033[1mline\033[22m"
+        assert len(viewer.checkpoints) == 4
+
+        for top in [0, 4, 7, 20]:
+            viewer.scroll_to(top)
+            viewer.render()
+            expected.erase()
+            expected.move(0, 0)
+            expected.adddocument(TEXT, skip=viewer.top)
+            assert screen(viewer.cusser) == screen(expected)
+        assert viewer.top == 8
+        assert viewer.cusser.window.text().startswith("008 line")
+
+
+def test_index(tmp_path):
+    """Ensure indexes are saved, and only loaded for the same file."""
+    path, index_path = tmp_path / "log.txt", tmp_path / "log.idx"
+    path.write_text(TEXT)
+    with FileViewer.open(
+        Cusser.headless(), path, index_path, checkpoint_interval=5
+    ) as viewer:
+        offsets, checkpoints = viewer.offsets, viewer.checkpoints
+    assert index_path.exists()
+
+    with FileViewer.open(Cusser.headless(), path, index_path) as viewer:
+        assert viewer.checkpoint_interval == 5
+        assert viewer.offsets == offsets
+        assert viewer.checkpoints == checkpoints
+
+    path.write_text("changed\n")
+    with FileViewer.open(Cusser.headless(), path, index_path) as viewer:
+        assert len(viewer) == 1
+        assert viewer.checkpoint_interval == 1000
+
+
+def test_empty(tmp_path):
+    """Ensure empty files can be viewed."""
+    path = tmp_path / "empty.txt"
+    path.write_text("")
+    with FileViewer.open(Cusser.headless(), path) as viewer:
+        assert len(viewer) == 0
+        viewer.render()